@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meets', '0003_alter_event_stroke'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['event', 'final_time'], name='result_event_final_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['event', 'is_disqualified', 'final_place'], name='result_event_dq_place_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 from core.models import Course, Stroke, Gender, TimeStampedModel
 
@@ -103,7 +104,7 @@ class Event(TimeStampedModel):
     def __str__(self):
         return f"{self.event_number} - {self.name}"
     
-    @property
+    @cached_property
     def event_key(self):
         """Generate a unique key for lookup in point systems"""
         gender_text = "Men's" if self.gender == Gender.MALE.value else \
@@ -152,6 +153,10 @@ class Result(TimeStampedModel):
 
     class Meta:
         ordering = ['event', 'final_place', 'prelim_place', 'swim_off_place']
+        indexes = [
+            models.Index(fields=['event', 'final_time'], name='result_event_final_time_idx'),
+            models.Index(fields=['event', 'is_disqualified', 'final_place'], name='result_event_dq_place_idx'),
+        ]
 
     def __str__(self):
         return f"{self.swimmer} - {self.event} - {self.final_time}"
@@ -159,12 +164,9 @@ class Result(TimeStampedModel):
     @property
     def best_time(self):
         """Return the best time from the final, prelim, or swim_off time; return 0 if none exist"""
-        times = []
-        if self.final_time and self.final_time > 0:
-            times.append(self.final_time)
-        if self.prelim_time and self.prelim_time > 0:
-            times.append(self.prelim_time)
-        if self.swim_off_time and self.swim_off_time > 0:
-            times.append(self.swim_off_time)
+        best = float('inf')
+        for time in (self.final_time, self.prelim_time, self.swim_off_time):
+            if time and 0 < time < best:
+                best = time
         
-        return min(times) if times else 0
\ No newline at end of file
+        return 0 if best == float('inf') else best
\ No newline at end of file
@@ -1,63 +1,110 @@
-from typing import Dict, Union, Optional
+import functools
+from collections import defaultdict
+from typing import Dict, Union, Optional, Tuple
 import numpy as np
-from scipy.interpolate import interp1d
+from django.utils import timezone
 from .pointSystem import pointSystem6, pointSystem7, pointSystem8, pointSystem9, pointSystem10, pointSystem11, pointSystem12, pointSystem13, pointSystem14, pointSystem15plus
 from core.utils import parse_swim_time
 from core.models import Gender
 
+POINT_SYSTEMS = {
+    6: pointSystem6,
+    7: pointSystem7,
+    8: pointSystem8,
+    9: pointSystem9,
+    10: pointSystem10,
+    11: pointSystem11,
+    12: pointSystem12,
+    13: pointSystem13,
+    14: pointSystem14,
+    15: pointSystem15plus,  # For 15 and older
+}
+
+@functools.lru_cache(maxsize=None)
+def _point_table_soa() -> Tuple[Dict[Tuple[int, str, str], slice], np.ndarray, np.ndarray]:
+    """
+    Flatten every point table into two contiguous float64 arrays.
+    
+    Returns:
+        Tuple of (index, times, points) where index maps (age, gender, event) to the
+        slice of times/points holding that event's table, sorted by time
+    """
+    index = {}
+    times = []
+    points = []
+    for age, point_system in POINT_SYSTEMS.items():
+        for gender, events in point_system.items():
+            for event, point_table in events.items():
+                start = len(times)
+                for time, score in sorted(point_table.items()):
+                    times.append(time)
+                    points.append(score)
+                index[(age, gender, event)] = slice(start, len(times))
+    return index, np.asarray(times, dtype=np.float64), np.asarray(points, dtype=np.float64)
+
+# (time field, points field) pairs scored on each Result
+RESULT_TIME_FIELDS = (
+    ('prelim_time', 'prelim_points'),
+    ('swim_off_time', 'swim_off_points'),
+    ('final_time', 'final_points'),
+)
+
+# Sentinel for cache misses, since None is a valid cached "no table" value
+_MISSING = object()
+
 class ScoringSystem:
     def __init__(self):
         """Initialize the scoring system with all point system versions."""
-        self.point_systems = {
-            6: pointSystem6,
-            7: pointSystem7,
-            8: pointSystem8,
-            9: pointSystem9,
-            10: pointSystem10,
-            11: pointSystem11,
-            12: pointSystem12,
-            13: pointSystem13,
-            14: pointSystem14,
-            15: pointSystem15plus,  # For 15 and older
-        }
+        self.point_systems = POINT_SYSTEMS
+        # Sorted (times, points) arrays per (event_key, point age), looked up on first use
+        self._point_arrays = {}
+
+    @staticmethod
+    def _get_point_age(age: Optional[int] = None, event_max_age: Optional[int] = None) -> int:
+        """Get the point system age to score with."""
+        # If age is None, use event max age if available, otherwise use 15plus
+        if age is None:
+            if event_max_age is not None:
+                return event_max_age
+            return 15  # Use 15plus scoring system as fallback
+        return age if age > 0 and age < 15 else 15
 
-    def _get_point_table(self, event_key: str, age: Optional[int] = None, event_max_age: Optional[int] = None) -> Optional[Dict[float, float]]:
-        """Get the appropriate point table for an event and age."""
+    def _get_point_arrays(self, event_key: str, age: Optional[int] = None, event_max_age: Optional[int] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get the point table for an event and age as sorted (times, points) arrays.
+        
+        The arrays are slices of the flattened tables from _point_table_soa, so no
+        table is sorted or converted per call.
+        """
+        key = (event_key, self._get_point_age(age, event_max_age))
+        arrays = self._point_arrays.get(key, _MISSING)
+        if arrays is not _MISSING:
+            return arrays
+        
         words = event_key.split(" ")
         event_gender = words[0]
         actual_event = " ".join(words[1:])
-
         if event_gender == "Mixed":
             event_gender = "Men's"
-
-        # If age is None, use event max age if available, otherwise use 15plus
-        if age is None:
-            if event_max_age is not None:
-                point_age = event_max_age
-            else:
-                point_age = 15  # Use 15plus scoring system as fallback
-        else:
-            point_age = age if age > 0 and age < 15 else 15
-            
-        # Get the appropriate point system for the age
-        point_system = self.point_systems.get(point_age)
-        if not point_system:
-            # If no exact match, use the 15plus system
-            point_system = self.point_systems.get(15)
-            if not point_system:
-                print(f"Warning: No point system found for age {point_age}")
-                return None
-        
-        # Get the point table for the event
-        return point_system.get(event_gender).get(actual_event)
+        
+        # Ages without their own point system use the 15plus one
+        point_age = key[1] if key[1] in self.point_systems else 15
+        
+        index, all_times, all_points = _point_table_soa()
+        table_slice = index.get((point_age, event_gender, actual_event))
+        arrays = None
+        if table_slice is not None:
+            arrays = (all_times[table_slice], all_points[table_slice])
+        self._point_arrays[key] = arrays
+        return arrays
 
     def calculate_points(self, event_key: str, time: float, age: Optional[int] = None, event_max_age: Optional[int] = None, gender: Optional[str] = None) -> float:
         """Calculate points for a given event and time"""
         # Get the appropriate point table based on age
-        point_table = self._get_point_table(event_key, age, event_max_age)
+        point_arrays = self._get_point_arrays(event_key, age, event_max_age)
         
         # If no point table found, return 0 points
-        if point_table is None:
+        if point_arrays is None:
             # print(f"Warning: No point table found for event {event_key} with age {age}, event max age {event_max_age}, and gender {gender}")
             return 0.0
         # else:
@@ -72,22 +119,54 @@ class ScoringSystem:
         if time is None or time <= 0:
             return 0.0
             
-        # Get the point values and times from the table
-        time_points = sorted(point_table.items())
-        points = [s for _, s in time_points]
-        times = [t for t, _ in time_points]
+        times, points = point_arrays
 
-        f = interp1d(times, points, bounds_error=False, fill_value="extrapolate")
-        score = float(f(time))
+        # np.interp clamps at the table ends, so extrapolate linearly outside them
+        if times.size > 1 and time < times[0]:
+            score = points[0] + (time - times[0]) * (points[1] - points[0]) / (times[1] - times[0])
+        elif times.size > 1 and time > times[-1]:
+            score = points[-1] + (time - times[-1]) * (points[-1] - points[-2]) / (times[-1] - times[-2])
+        else:
+            score = np.interp(time, times, points)
+        score = float(score)
         return score if score > 0 else 0.0
 
+    def calculate_points_vec(self, event_key: str, times, age: Optional[int] = None, event_max_age: Optional[int] = None) -> np.ndarray:
+        """
+        Calculate points for many times (or dryland scores) in one event and age bracket.
+        
+        Equivalent to calling calculate_points for each value, but the point table is
+        looked up once and all values are interpolated in a single NumPy pass.
+        """
+        times = np.asarray(times, dtype=float)
+        point_arrays = self._get_point_arrays(event_key, age, event_max_age)
+        if point_arrays is None or times.size == 0:
+            return np.zeros_like(times)
+        
+        table_times, table_points = point_arrays
+        
+        scores = np.interp(times, table_times, table_points)
+        
+        # np.interp clamps at the table ends; extrapolate linearly like calculate_points does
+        if table_times.size > 1:
+            below = times < table_times[0]
+            above = times > table_times[-1]
+            low_slope = (table_points[1] - table_points[0]) / (table_times[1] - table_times[0])
+            high_slope = (table_points[-1] - table_points[-2]) / (table_times[-1] - table_times[-2])
+            scores[below] = table_points[0] + (times[below] - table_times[0]) * low_slope
+            scores[above] = table_points[-1] + (times[above] - table_times[-1]) * high_slope
+        
+        scores[times <= 0] = 0.0
+        return np.maximum(scores, 0.0)
+
 
-    def calculate_result_points(self, result) -> None:
+    def calculate_result_points(self, result, save: bool = True) -> None:
         """
         Calculate and update points for a Result object.
         
         Args:
-            result: A Result model instance
+            result: A Result model instance, ideally loaded with select_related('event__meet', 'swimmer')
+            save: Whether to save the result; pass False when the caller batches writes with bulk_update
         """
         event_key = result.event.event_key
         
@@ -101,14 +180,72 @@ class ScoringSystem:
         if result.final_time and result.final_time > 0:
             result.final_points = self.calculate_points(event_key, result.final_time, result.swimmer.age, result.event.max_age)
             
-        result.save()
+        if save:
+            result.save(update_fields=['prelim_points', 'swim_off_points', 'final_points', 'updated_at'])
 
-    def calculate_meet_points(self, meet) -> None:
+    def _score_result_batch(self, results, event_keys: Dict[int, str]) -> None:
+        """
+        Score a batch of results in place, one vectorized call per (event, point age) group.
+        
+        Args:
+            results: Result instances loaded with select_related('event__meet', 'swimmer')
+            event_keys: Event id to event key cache shared across batches; updated in place
+        """
+        # Group results by (event, point system age) since together they select the point table;
+        # ages sharing a table (e.g. every 15 and over swimmer) are scored together
+        groups = defaultdict(list)
+        for result in results:
+            point_age = self._get_point_age(result.swimmer.age, result.event.max_age)
+            groups[(result.event_id, point_age)].append(result)
+        
+        for (event_id, point_age), group in groups.items():
+            event = group[0].event
+            # select_related gives each result its own Event instance, so build each key once per event
+            if event_id not in event_keys:
+                event_keys[event_id] = event.event_key
+            event_key = event_keys[event_id]
+            # Stack every (result, time field) pair of the group so one vectorized call scores them all
+            targets = [
+                (result, points_field, getattr(result, time_field) or 0)
+                for time_field, points_field in RESULT_TIME_FIELDS
+                for result in group
+            ]
+            times = np.array([time for _, _, time in targets], dtype=np.float64)
+            points = self.calculate_points_vec(event_key, times, point_age, event.max_age)
+            # Only overwrite points for times that exist, like calculate_result_points
+            for (result, points_field, time), point in zip(targets, points.tolist()):
+                if time > 0:
+                    setattr(result, points_field, point)
+
+    def calculate_meet_points(self, meet, batch_size: int = 500) -> None:
         """
         Calculate points for all results in a meet.
         
+        The meet's result ids are loaded first, ordered by event, then results are fetched,
+        scored with _score_result_batch and written back with one bulk_update per batch of
+        ids, so memory stays bounded by the batch size and no write runs under an open read.
+        
         Args:
             meet: A Meet model instance
+            batch_size: Number of results loaded, scored and updated at a time
         """
-        for result in meet.results.all():
-            self.calculate_result_points(result) 
\ No newline at end of file
+        from meets.models import Result
+        
+        # bulk_update skips auto_now, so updated_at is set and written explicitly
+        update_fields = [points_field for _, points_field in RESULT_TIME_FIELDS] + ['updated_at']
+        result_ids = list(
+            Result.objects.filter(event__meet=meet).order_by('event_id', 'pk').values_list('pk', flat=True)
+        )
+        
+        event_keys = {}
+        for start in range(0, len(result_ids), batch_size):
+            batch = list(
+                Result.objects.filter(pk__in=result_ids[start:start + batch_size])
+                .select_related('event__meet', 'swimmer')
+                .order_by('event_id', 'pk')
+            )
+            self._score_result_batch(batch, event_keys)
+            now = timezone.now()
+            for result in batch:
+                result.updated_at = now
+            Result.objects.bulk_update(batch, update_fields)
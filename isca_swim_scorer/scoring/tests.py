@@ -1,3 +1,115 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Course, Gender, Stroke
+from meets.models import Meet, Team, Swimmer, Event, Result
+from scoring.scoring_system import ScoringSystem
+
+# Men's 10 "50 Butterfly (SCY)" starts (26.58, 1000), (28.35, 950) and ends (45.69, 150), (46.69, 100),
+# so its two ends have different slopes; Men's 10 "Chin-Ups" runs (2, 100) ... (20, 1000) at 50 points a rep.
+# Expected values below are what scipy's interp1d(..., fill_value="extrapolate") gave for these tables.
+FLY_EVENT = "Men's 50 Butterfly (SCY)"
+CHIN_UPS_EVENT = "Men's Chin-Ups"
+AGE = 10
+
+
+class CalculatePointsTests(SimpleTestCase):
+    def setUp(self):
+        self.scoring = ScoringSystem()
+
+    def test_time_on_a_breakpoint_scores_the_table_value(self):
+        self.assertAlmostEqual(self.scoring.calculate_points(FLY_EVENT, 26.58, AGE), 1000.0)
+        self.assertAlmostEqual(self.scoring.calculate_points(FLY_EVENT, 30.29, AGE), 900.0)
+        self.assertAlmostEqual(self.scoring.calculate_points(FLY_EVENT, 46.69, AGE), 100.0)
+
+    def test_time_between_breakpoints_is_interpolated(self):
+        # Halfway between (30.29, 900) and (31.01, 850)
+        self.assertAlmostEqual(self.scoring.calculate_points(FLY_EVENT, 30.65, AGE), 875.0)
+
+    def test_time_faster_than_table_extrapolates_along_first_segment(self):
+        # 1000 + (25.00 - 26.58) * (950 - 1000) / (28.35 - 26.58)
+        self.assertAlmostEqual(self.scoring.calculate_points(FLY_EVENT, 25.0, AGE), 1044.6327683615818)
+
+    def test_time_slower_than_table_extrapolates_along_last_segment(self):
+        # 100 + (47.69 - 46.69) * (100 - 150) / (46.69 - 45.69)
+        self.assertAlmostEqual(self.scoring.calculate_points(FLY_EVENT, 47.69, AGE), 50.0)
+
+    def test_extrapolated_points_never_go_negative(self):
+        self.assertEqual(self.scoring.calculate_points(FLY_EVENT, 60.0, AGE), 0.0)
+
+    def test_dryland_scores_extrapolate_at_both_ends(self):
+        self.assertAlmostEqual(self.scoring.calculate_points(CHIN_UPS_EVENT, 1, AGE), 50.0)
+        self.assertAlmostEqual(self.scoring.calculate_points(CHIN_UPS_EVENT, 21, AGE), 1050.0)
+
+    def test_missing_time_or_table_scores_zero(self):
+        self.assertEqual(self.scoring.calculate_points(FLY_EVENT, 0, AGE), 0.0)
+        self.assertEqual(self.scoring.calculate_points(FLY_EVENT, None, AGE), 0.0)
+        self.assertEqual(self.scoring.calculate_points("Men's 5000 Butterfly (SCY)", 30.0, AGE), 0.0)
+
+
+class CalculatePointsVecTests(SimpleTestCase):
+    def setUp(self):
+        self.scoring = ScoringSystem()
+
+    def assertMatchesScalar(self, event_key, values, age=AGE, event_max_age=None):
+        vec_points = self.scoring.calculate_points_vec(event_key, values, age, event_max_age).tolist()
+        self.assertEqual(len(vec_points), len(values))
+        for value, vec_point in zip(values, vec_points):
+            with self.subTest(value=value):
+                self.assertAlmostEqual(vec_point, self.scoring.calculate_points(event_key, value, age, event_max_age))
+
+    def test_swim_times_match_scalar_scoring(self):
+        # Below the table, on breakpoints, between them, above the table, clamped at 0, and missing
+        self.assertMatchesScalar(FLY_EVENT, [25.0, 26.58, 30.29, 30.65, 46.69, 47.69, 60.0, 0.0, -1.0])
+
+    def test_dryland_scores_match_scalar_scoring(self):
+        self.assertMatchesScalar(CHIN_UPS_EVENT, [1, 2, 7.5, 20, 21, 0])
+
+    def test_age_fallbacks_match_scalar_scoring(self):
+        # No age uses the event max age; ages past the tables use the 15 and over one
+        self.assertMatchesScalar(FLY_EVENT, [25.0, 30.65, 47.69], age=None, event_max_age=AGE)
+        self.assertMatchesScalar("Women's 100 Freestyle (SCY)", [40.0, 70.0, 200.0], age=17)
+
+    def test_unknown_event_scores_zero(self):
+        points = self.scoring.calculate_points_vec("Men's 5000 Butterfly (SCY)", [30.0, 40.0], AGE)
+        self.assertEqual(points.tolist(), [0.0, 0.0])
+
+    def test_empty_input(self):
+        self.assertEqual(self.scoring.calculate_points_vec(FLY_EVENT, [], AGE).tolist(), [])
+
+
+class CalculateMeetPointsTests(TestCase):
+    def setUp(self):
+        self.meet = Meet.objects.create(
+            name='Test Meet', slug='test-meet', location='Test Pool',
+            start_date=datetime.date(2024, 3, 1), end_date=datetime.date(2024, 3, 3), course=Course.SHORT_COURSE_YARDS
+        )
+        team = Team.objects.create(meet=self.meet, code='ABC', name='Alpha Swim Club')
+        self.event = Event.objects.create(
+            meet=self.meet, event_number=1, name=FLY_EVENT, distance=50, stroke=Stroke.BUTTERFLY,
+            gender=Gender.MALE, min_age=9, max_age=AGE
+        )
+        self.swimmers = [
+            Swimmer.objects.create(meet=self.meet, team=team, swimmer_meet_id=str(number), first_name='Swimmer',
+                                   last_name=str(number), gender=Gender.MALE, age=AGE)
+            for number in range(3)
+        ]
+
+    def test_scores_every_result_across_batches(self):
+        times = [(31.01, 30.29), (26.58, None), (None, 47.69)]
+        results = [
+            Result.objects.create(swimmer=swimmer, event=self.event, prelim_time=prelim_time, final_time=final_time)
+            for swimmer, (prelim_time, final_time) in zip(self.swimmers, times)
+        ]
+        before = {result.pk: result.updated_at for result in results}
+
+        ScoringSystem().calculate_meet_points(self.meet, batch_size=2)
+
+        scored = {result.pk: result for result in Result.objects.filter(event__meet=self.meet)}
+        expected = [(850.0, 900.0), (1000.0, 0.0), (0.0, 50.0)]
+        for result, (prelim_points, final_points) in zip(results, expected):
+            with self.subTest(swimmer=result.swimmer.swimmer_meet_id):
+                self.assertAlmostEqual(scored[result.pk].prelim_points, prelim_points)
+                self.assertAlmostEqual(scored[result.pk].final_points, final_points)
+                self.assertGreater(scored[result.pk].updated_at, before[result.pk])
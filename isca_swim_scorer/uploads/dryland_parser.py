@@ -1,7 +1,23 @@
+"""
+Parser for dryland event spreadsheets (XLSX/XLS).
+
+Teams, swimmers, events and results are collected in memory while the sheet is
+read and written with bulk_create afterwards. Every bulk_create uses
+DRYLAND_BULK_BATCH_SIZE rows per INSERT (env var, default 1000). On Postgres,
+throughput plateaus around 1000 rows per statement and can drop again at
+50k-100k. Very large batches also risk "request too large" and out-of-memory
+errors. Lower the value if the database rejects statements; raising it well past
+1000 rarely helps.
+"""
 import sys
 import os
+import re
 import logging
-from typing import Dict, List, Tuple, Optional
+import functools
+from collections import defaultdict
+from itertools import chain, islice
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple, Optional
 from django.db import transaction
 from django.utils.text import slugify
 
@@ -12,8 +28,17 @@ from core.models import Stroke, Gender
 
 logger = logging.getLogger(__name__)
 
+# Number of rows per INSERT for every bulk_create in this module (see module docstring)
+DRYLAND_BULK_BATCH_SIZE = int(os.environ.get("DRYLAND_BULK_BATCH_SIZE", "1000"))
+
+# First event number handed to a dryland event whose synthetic number is already taken; it sits
+# above every synthetic number (9000 + gender offset + age group * 100 + column)
+DRYLAND_OVERFLOW_EVENT_NUMBER = 20000
+
 # Add hytek-parser path for xlrd
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "hytek-parser"))
+HYTEK_PARSER_PATH = os.path.join(os.path.dirname(__file__), "hytek-parser")
+if HYTEK_PARSER_PATH not in sys.path:
+    sys.path.insert(0, HYTEK_PARSER_PATH)
 
 try:
     import xlrd
@@ -31,17 +56,79 @@ class DrylandParseError(Exception):
     """Exception raised when parsing dryland Excel files fails"""
     pass
 
+class DrylandResult:
+    """
+    One scored athlete/event cell.
+    
+    Uses __slots__ to keep per-cell memory small while a sheet is processed; entries are
+    converted to plain dicts with to_dict() when results are returned.
+    """
+    __slots__ = ('swimmer', 'raw_age', 'score', 'points', 'gender', 'team_code',
+                 'team_name', 'event_type', 'min_age', 'max_age')
+    
+    def __init__(self, swimmer, raw_age, score, points, gender, team_code, team_name,
+                 event_type, min_age, max_age):
+        self.swimmer = swimmer
+        self.raw_age = raw_age
+        self.score = score
+        self.points = points
+        self.gender = gender
+        self.team_code = team_code
+        self.team_name = team_name
+        self.event_type = event_type
+        self.min_age = min_age
+        self.max_age = max_age
+    
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+class AthleteRecord(NamedTuple):
+    """Athlete identity for one data row, extracted once before the per-event loop."""
+    full_name: str
+    first_name: str
+    last_name: str
+    age: Optional[int]
+    team_name: str
+    gender: str
+    row_idx: int
+    scores: tuple  # Raw score cell per event column, in column_mapping['events'] order; None if missing
+
+class WorkbookRows:
+    """
+    Data rows streamed from a read-only openpyxl workbook.
+    
+    Empty rows are skipped. The workbook is closed once the rows run out or close() is
+    called; close() also works before iteration starts, unlike a generator's finally block.
+    """
+    
+    def __init__(self, workbook, rows: Iterator[Sequence]):
+        self._workbook = workbook
+        self._rows = rows
+    
+    def __iter__(self) -> 'WorkbookRows':
+        return self
+    
+    def __next__(self) -> Sequence:
+        for row in self._rows:
+            if row and any(row):  # Skip empty rows
+                return row
+        self.close()
+        raise StopIteration
+    
+    def close(self) -> None:
+        self._workbook.close()
+
 def detect_excel_format(file_path: str) -> str:
     """Detect if the Excel file is XLS or XLSX format"""
     _, ext = os.path.splitext(file_path.lower())
     return ext
 
-def parse_excel_data(file_path: str) -> Tuple[List[str], List[List]]:
+def parse_excel_data(file_path: str) -> Tuple[List[str], Iterable[Sequence]]:
     """
     Parse Excel file and return headers and data rows
     
     Returns:
-        Tuple of (headers, data_rows)
+        Tuple of (headers, data_rows); data_rows may be a lazy iterator of raw cell values
     """
     file_format = detect_excel_format(file_path)
     
@@ -52,23 +139,31 @@ def parse_excel_data(file_path: str) -> Tuple[List[str], List[List]]:
     else:
         raise DrylandParseError(f"Unsupported file format {file_format} or missing required library")
 
-def parse_xlsx_with_openpyxl(file_path: str) -> Tuple[List[str], List[List]]:
-    """Parse XLSX file using openpyxl"""
+def parse_xlsx_with_openpyxl(file_path: str) -> Tuple[List[str], WorkbookRows]:
+    """
+    Parse XLSX file using openpyxl
+    
+    Rows are streamed from the worksheet: only the header search window is held in
+    memory. Data rows keep their native cell values; callers convert only the cells
+    they read (see cell_str, cell_int and cell_float). Callers must close() the
+    returned rows if they stop before exhausting them.
+    """
+    workbook = None
     try:
-        workbook = load_workbook(file_path, read_only=True)
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
         worksheet = workbook.active
+        rows = worksheet.iter_rows(values_only=True)
         
-        # Get all rows as values
-        rows = list(worksheet.values)
+        # Find header row (look for a row containing 'Name' or 'Athlete') in the first 10 rows
+        header_window = list(islice(rows, 10))
         
-        if not rows:
+        if not header_window:
             raise DrylandParseError("Excel file is empty")
         
-        # Find header row (look for a row containing 'Name' or 'Athlete')
         header_row_idx = 0
         headers = None
         
-        for i, row in enumerate(rows[:10]):  # Check first 10 rows
+        for i, row in enumerate(header_window):
             if row and any(cell and str(cell).lower().strip() in ['name', 'athlete', 'swimmer'] for cell in row):
                 header_row_idx = i
                 headers = [str(cell).strip() if cell else '' for cell in row]
@@ -76,22 +171,24 @@ def parse_xlsx_with_openpyxl(file_path: str) -> Tuple[List[str], List[List]]:
         
         if headers is None:
             # If no clear header found, assume first row
-            headers = [str(cell).strip() if cell else '' for cell in rows[0]]
+            headers = [str(cell).strip() if cell else '' for cell in header_window[0]]
             header_row_idx = 0
         
-        # Get data rows
-        data_rows = []
-        for row in rows[header_row_idx + 1:]:
-            if row and any(cell for cell in row):  # Skip empty rows
-                data_rows.append([str(cell).strip() if cell else '' for cell in row])
+        # Data rows are whatever is left of the window followed by the rest of the sheet
+        remaining_rows = chain(header_window[header_row_idx + 1:], rows)
         
-        return headers, data_rows
+        return headers, WorkbookRows(workbook, remaining_rows)
         
     except Exception as e:
+        # The rows were never handed out, so nothing else will close the workbook
+        if workbook is not None:
+            workbook.close()
+        if isinstance(e, DrylandParseError):
+            raise
         raise DrylandParseError(f"Error parsing XLSX file: {str(e)}")
 
 def parse_xls_with_xlrd(file_path: str) -> Tuple[List[str], List[List]]:
-    """Parse XLS file using xlrd"""
+    """Parse XLS file using xlrd; data rows keep their native cell values"""
     try:
         workbook = xlrd.open_workbook(file_path)
         worksheet = workbook.sheet_by_index(0)
@@ -104,7 +201,7 @@ def parse_xls_with_xlrd(file_path: str) -> Tuple[List[str], List[List]]:
         headers = None
         
         for i in range(min(10, worksheet.nrows)):  # Check first 10 rows
-            row = [str(worksheet.cell_value(i, j)).strip() for j in range(worksheet.ncols)]
+            row = [str(cell).strip() for cell in worksheet.row_values(i)]
             if any(cell.lower() in ['name', 'athlete', 'swimmer'] for cell in row if cell):
                 header_row_idx = i
                 headers = row
@@ -112,21 +209,39 @@ def parse_xls_with_xlrd(file_path: str) -> Tuple[List[str], List[List]]:
         
         if headers is None:
             # If no clear header found, assume first row
-            headers = [str(worksheet.cell_value(0, j)).strip() for j in range(worksheet.ncols)]
+            headers = [str(cell).strip() for cell in worksheet.row_values(0)]
             header_row_idx = 0
         
         # Get data rows
         data_rows = []
         for i in range(header_row_idx + 1, worksheet.nrows):
-            row = [str(worksheet.cell_value(i, j)).strip() for j in range(worksheet.ncols)]
-            if any(cell for cell in row):  # Skip empty rows
-                data_rows.append(row)
+            raw_row = worksheet.row_values(i)
+            if not any(raw_row):  # Skip empty rows
+                continue
+            data_rows.append(raw_row)
         
         return headers, data_rows
         
     except Exception as e:
         raise DrylandParseError(f"Error parsing XLS file: {str(e)}")
 
+# Header keywords used by identify_columns, built once at import time
+_FIRST_NAME_HEADERS = frozenset({'first name', 'firstname', 'first', 'fname'})
+_LAST_NAME_HEADERS = frozenset({'last name', 'lastname', 'last', 'lname', 'surname'})
+_NAME_HEADERS = frozenset({'name', 'athlete', 'swimmer', 'athlete name', 'swimmer name', 'full name'})
+_AGE_HEADERS = frozenset({'age', 'athlete age', 'swimmer age'})
+_TEAM_HEADERS = frozenset({'team', 'club', 'team name', 'club name', 'team code'})
+_GENDER_HEADERS = frozenset({'sex', 'm/f', 'male/female'})
+_NON_EVENT_HEADERS = frozenset({'age', 'team', 'name', 'first', 'last', 'gender'})
+# Spaces, hyphens and parentheses are ignored when deciding if a header looks like an event
+_HEADER_DROP_CHARS = str.maketrans('', '', ' -()')
+
+# Specific dryland events (chin-ups, dips, jumps, push-ups, ...) matched anywhere in the header
+_EVENT_KEYWORDS_RE = re.compile(
+    r'chin[- ]?up|pull[- ]?up|dip|jump|push[- ]?up|press-?up|leg press|sit[- ]?up|crunch'
+    r'|plank|burpee|sprint|run|dash|mile|[124]00m|squat|bench|dead ?lift'
+)
+
 def identify_columns(headers: List[str]) -> Dict[str, int]:
     """
     Identify column indices for important fields
@@ -140,55 +255,56 @@ def identify_columns(headers: List[str]) -> Dict[str, int]:
         header_lower = header.lower().strip()
         
         # First Name column
-        if header_lower in ['first name', 'firstname', 'first', 'fname']:
+        if header_lower in _FIRST_NAME_HEADERS:
             column_mapping['first_name'] = i
         
         # Last Name column
-        elif header_lower in ['last name', 'lastname', 'last', 'lname', 'surname']:
+        elif header_lower in _LAST_NAME_HEADERS:
             column_mapping['last_name'] = i
         
         # Full Name column (fallback if first/last not separate)
-        elif header_lower in ['name', 'athlete', 'swimmer', 'athlete name', 'swimmer name', 'full name']:
+        elif header_lower in _NAME_HEADERS:
             if 'first_name' not in column_mapping and 'last_name' not in column_mapping:
                 column_mapping['name'] = i
         
         # Age column
-        elif header_lower in ['age', 'athlete age', 'swimmer age']:
+        elif header_lower in _AGE_HEADERS:
             column_mapping['age'] = i
         
         # Team column
-        elif header_lower in ['team', 'club', 'team name', 'club name', 'team code']:
+        elif header_lower in _TEAM_HEADERS:
             column_mapping['team'] = i
         
         # Gender column
-        elif 'gender' in header_lower or header_lower in ['sex', 'm/f', 'male/female']:
+        elif 'gender' in header_lower or header_lower in _GENDER_HEADERS:
             column_mapping['gender'] = i
         
         # Event score columns - specific dryland events
         elif (header and 
-              any(event in header_lower for event in [
-                  'chin-up', 'chinup', 'chin up', 'pull-up', 'pullup', 'pull up',
-                  'dip', 'dips', 'tricep dip', 'tricep dips',
-                  'vertical jump', 'vert jump', 'jump', 'standing jump',
-                  'push-up', 'pushup', 'push up', 'press-up', 'pressup',
-                  'sit-up', 'situp', 'sit up', 'crunch', 'crunches',
-                  'plank', 'planks', 'plank hold',
-                  'burpee', 'burpees',
-                  'sprint', 'run', 'dash', 'mile', '100m', '200m', '400m',
-                  'squat', 'squats', 'leg press',
-                  'bench', 'bench press',
-                  'deadlift', 'dead lift'
-              ]) or 
-              # Also catch any numeric or general event-like headers
-              (header_lower.replace(' ', '').replace('-', '').replace('(', '').replace(')', '').isalnum() and 
-               len(header_lower) > 2 and 
-               not header_lower in ['age', 'team', 'name', 'first', 'last', 'gender'])):
+              (_EVENT_KEYWORDS_RE.search(header_lower) or 
+               # Also catch any numeric or general event-like headers
+               (header_lower.translate(_HEADER_DROP_CHARS).isalnum() and 
+                len(header_lower) > 2 and 
+                header_lower not in _NON_EVENT_HEADERS))):
             if 'events' not in column_mapping:
                 column_mapping['events'] = []
             column_mapping['events'].append({'name': header, 'index': i})
     
     return column_mapping
 
+# Sort key for dryland result entries
+_score_key = attrgetter('score')
+
+# Same substitutions as django.utils.text.slugify, minus the Unicode normalization
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_HYPHEN_RE = re.compile(r'[-\s]+')
+
+def fast_slugify(value: str) -> str:
+    """Slugify ASCII names without Unicode normalization; defer to slugify otherwise"""
+    if not value.isascii():
+        return slugify(value)
+    return _SLUG_HYPHEN_RE.sub('-', _SLUG_STRIP_RE.sub('', value.lower())).strip('-_')
+
 def parse_athlete_name(name_str: str) -> Tuple[str, str]:
     """
     Parse athlete name into first and last name
@@ -211,6 +327,16 @@ def parse_athlete_name(name_str: str) -> Tuple[str, str]:
         # More than 2 parts - first is first name, rest is last name
         return parts[0], " ".join(parts[1:])
 
+# Gender spellings accepted in the gender column
+_GENDER_MAP = {
+    'm': Gender.MALE, 'male': Gender.MALE, 'man': Gender.MALE, 'boy': Gender.MALE,
+    'f': Gender.FEMALE, 'female': Gender.FEMALE, 'woman': Gender.FEMALE, 'girl': Gender.FEMALE,
+    'x': Gender.MIXED, 'mixed': Gender.MIXED, 'other': Gender.MIXED, 'non-binary': Gender.MIXED, 'nb': Gender.MIXED,
+}
+
+# Cell values repeat heavily across rows (ages, genders, small scores), so the
+# converters below are memoized per distinct value
+@functools.lru_cache(maxsize=1024)
 def safe_int(value: str, default: Optional[int] = None) -> Optional[int]:
     """Safely convert string to integer"""
     try:
@@ -218,6 +344,7 @@ def safe_int(value: str, default: Optional[int] = None) -> Optional[int]:
     except (ValueError, TypeError):
         return default
 
+@functools.lru_cache(maxsize=1024)
 def safe_float(value: str, default: Optional[float] = None) -> Optional[float]:
     """Safely convert string to float"""
     try:
@@ -225,6 +352,25 @@ def safe_float(value: str, default: Optional[float] = None) -> Optional[float]:
     except (ValueError, TypeError):
         return default
 
+def cell_str(value: Any) -> str:
+    """Convert a raw cell value to a stripped string, with '' for empty or zero cells"""
+    if not value:
+        return ''
+    return str(value).strip()
+
+def cell_int(value: Any, default: Optional[int] = None) -> Optional[int]:
+    """Convert a raw cell value to an integer; numeric cells skip string parsing"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value) if value else default
+    return safe_int(cell_str(value), default)
+
+def cell_float(value: Any, default: Optional[float] = None) -> Optional[float]:
+    """Convert a raw cell value to a float; numeric cells skip string parsing"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value else default
+    return safe_float(cell_str(value), default)
+
+@functools.lru_cache(maxsize=1024)
 def parse_gender(gender_str: str) -> str:
     """
     Parse gender string into Django model format
@@ -238,16 +384,7 @@ def parse_gender(gender_str: str) -> str:
     if not gender_str:
         return Gender.UNKNOWN
     
-    gender_lower = str(gender_str).lower().strip()
-    
-    if gender_lower in ['m', 'male', 'man', 'boy']:
-        return Gender.MALE
-    elif gender_lower in ['f', 'female', 'woman', 'girl']:
-        return Gender.FEMALE
-    elif gender_lower in ['x', 'mixed', 'other', 'non-binary', 'nb']:
-        return Gender.MIXED
-    else:
-        return Gender.UNKNOWN
+    return _GENDER_MAP.get(str(gender_str).lower().strip(), Gender.UNKNOWN)
 
 def normalize_event_name_for_scoring(event_name: str) -> str:
     """
@@ -301,225 +438,321 @@ def process_dryland_file(file_path: str, meet: Meet = None) -> Dict[str, List[di
         Dictionary of event results with athlete scores
     """
     try:
-        logger.info(f"Starting to process dryland file: {file_path}")
+        logger.info("Starting to process dryland file: %s", file_path)
         
-        # Parse the Excel file
+        # Parse the Excel file; XLSX data rows are streamed rather than loaded up front
         headers, data_rows = parse_excel_data(file_path)
+        try:
+            # Identify column structure
+            column_mapping = identify_columns(headers)
         
-        if not data_rows:
-            raise DrylandParseError("No data rows found in Excel file")
+            if ('name' not in column_mapping and 
+                ('first_name' not in column_mapping or 'last_name' not in column_mapping)):
+                raise DrylandParseError("Could not find athlete name columns (need either 'name' or both 'first_name' and 'last_name')")
         
-        # Identify column structure
-        column_mapping = identify_columns(headers)
-        
-        if ('name' not in column_mapping and 
-            ('first_name' not in column_mapping or 'last_name' not in column_mapping)):
-            raise DrylandParseError("Could not find athlete name columns (need either 'name' or both 'first_name' and 'last_name')")
-        
-        if 'events' not in column_mapping:
-            raise DrylandParseError("Could not find any event score columns")
-        
-        # Initialize scoring system
-        scoring = ScoringSystem()
-        
-        # Process data and organize by events
-        results = {}
-        
-        # Create events for each score column and age group
-        for event_info in column_mapping['events']:
-            # Clean up event name for better display
-            clean_event_name = event_info['name'].strip()
-            # Remove parenthetical units for the display name but keep the info
-            if '(' in clean_event_name and ')' in clean_event_name:
-                base_name = clean_event_name.split('(')[0].strip()
-                unit = clean_event_name.split('(')[1].split(')')[0].strip()
-                base_event_name = f"Dryland - {base_name}"
-                if unit:
-                    base_event_name += f" ({unit})"
-            else:
-                base_event_name = f"Dryland - {clean_event_name}"
+            if 'events' not in column_mapping:
+                raise DrylandParseError("Could not find any event score columns")
+        
+            # Initialize scoring system
+            scoring = ScoringSystem()
+        
+            # Process data and organize by events; lists are only created for events that get results
+            results = defaultdict(list)
+        
+            # Build event names for each score column and age group
+            for event_info in column_mapping['events']:
+                # Clean up event name for better display
+                clean_event_name = event_info['name'].strip()
+                # Remove parenthetical units for the display name but keep the info
+                if '(' in clean_event_name and ')' in clean_event_name:
+                    base_name = clean_event_name.split('(')[0].strip()
+                    unit = clean_event_name.split('(')[1].split(')')[0].strip()
+                    short_name = f"{base_name} ({unit})" if unit else base_name
+                else:
+                    short_name = clean_event_name
             
-            # Create events for each age group and gender
-            age_groups = [(6, 6), (7, 7), (8, 8), (9, 9), (10, 10), (11, 11), (12, 12), (13, 13), (14, 14), (15, 99)]
-            genders = [Gender.MALE, Gender.FEMALE]
+                # These names only depend on the column header, so build them once per event
+                event_info['short_name'] = short_name
+                event_info['normalized'] = normalize_event_name_for_scoring(clean_event_name)
+                event_info['age_event_by_key'] = {}
             
-            for gender in genders:
-                for min_age, max_age in age_groups:
-                    # Get gender prefix
-                    gender_prefix = "Men's" if gender == Gender.MALE else "Women's"
+                # Create events for each age group and gender
+                age_groups = [(6, 6), (7, 7), (8, 8), (9, 9), (10, 10), (11, 11), (12, 12), (13, 13), (14, 14), (15, 99)]
+                genders = [Gender.MALE, Gender.FEMALE]
+            
+                for gender in genders:
+                    for min_age, max_age in age_groups:
+                        # Get gender prefix
+                        gender_prefix = "Men's" if gender == Gender.MALE else "Women's"
                     
-                    # Get age group display name
-                    if max_age == 99:
-                        age_display = "Open"
-                    else:
-                        age_display = str(min_age)
+                        # Get age group display name
+                        if max_age == 99:
+                            age_display = "Open"
+                        else:
+                            age_display = str(min_age)
                     
-                    # Create event name with gender and age group
-                    event_name = f"{gender_prefix} {base_event_name.replace('Dryland - ', '')} - {age_display}"
-                    results[event_name] = []
-        
-        # Process each athlete row
-        for row_idx, row in enumerate(data_rows):
-            try:
-                # Extract athlete info
-                if 'first_name' in column_mapping and 'last_name' in column_mapping:
-                    # Prefer separate first/last name columns
-                    first_name = row[column_mapping['first_name']] if column_mapping['first_name'] < len(row) else ""
-                    last_name = row[column_mapping['last_name']] if column_mapping['last_name'] < len(row) else ""
-                    full_name = f"{first_name} {last_name}".strip()
-                elif 'name' in column_mapping:
-                    # Fall back to full name column
-                    full_name = row[column_mapping['name']] if column_mapping['name'] < len(row) else ""
-                    first_name, last_name = parse_athlete_name(full_name)
-                else:
-                    continue  # Skip if no name info
+                        # Create event name with gender and age group
+                        event_name = f"{gender_prefix} {short_name} - {age_display}"
+                        event_info['age_event_by_key'][(gender_prefix, min_age)] = event_name
+        
+            # Database rows are collected here and inserted in batches after the event loop
+            team_names: Dict[str, str] = {}
+            swimmer_rows: Dict[str, dict] = {}
+            event_rows: Dict[str, dict] = {}
+            pending_results: List[Tuple[str, str, Result]] = []
+        
+            # Scores are grouped by (event_key, age) and scored in one vectorized pass after the event loop
+            score_groups: Dict[Tuple[str, Optional[int]], list] = defaultdict(list)
+        
+            # Column indices are read from column_mapping once instead of per row; the
+            # name check above guarantees either both split name columns or a full name column
+            split_names = 'first_name' in column_mapping and 'last_name' in column_mapping
+            first_name_idx = column_mapping.get('first_name')
+            last_name_idx = column_mapping.get('last_name')
+            name_idx = column_mapping.get('name')
+            age_idx = column_mapping.get('age')
+            team_idx = column_mapping.get('team')
+            gender_idx = column_mapping.get('gender')
+            # Only the score cells are kept per athlete, so the sheet itself is never held in memory
+            score_cols = [event_info['index'] for event_info in column_mapping['events']]
+        
+            # Extract athlete identity once per row so the per-event loop below doesn't re-parse it
+            athletes: List[AthleteRecord] = []
+            row_idx = -1
+            for row_idx, row in enumerate(data_rows):
+                try:
+                    row_len = len(row)
                 
-                if not full_name or not first_name:
-                    continue  # Skip empty name rows
+                    # Extract athlete info
+                    if split_names:
+                        # Prefer separate first/last name columns
+                        first_name = cell_str(row[first_name_idx]) if first_name_idx < row_len else ""
+                        last_name = cell_str(row[last_name_idx]) if last_name_idx < row_len else ""
+                        full_name = f"{first_name} {last_name}".strip()
+                    else:
+                        # Fall back to full name column
+                        full_name = cell_str(row[name_idx]) if name_idx < row_len else ""
+                        first_name, last_name = parse_athlete_name(full_name)
                 
-                # Extract age
-                age = None
-                if 'age' in column_mapping and column_mapping['age'] < len(row):
-                    age = safe_int(row[column_mapping['age']])
+                    if not full_name or not first_name:
+                        continue  # Skip empty name rows
                 
-                # Extract team
-                team_name = ""
-                if 'team' in column_mapping and column_mapping['team'] < len(row):
-                    team_name = row[column_mapping['team']]
+                    # Extract age
+                    age = None
+                    if age_idx is not None and age_idx < row_len:
+                        age = cell_int(row[age_idx])
                 
-                # Extract gender
-                gender = Gender.UNKNOWN
-                if 'gender' in column_mapping and column_mapping['gender'] < len(row):
-                    gender = parse_gender(row[column_mapping['gender']])
+                    # Extract team
+                    team_name = ""
+                    if team_idx is not None and team_idx < row_len:
+                        team_name = cell_str(row[team_idx])
                 
-                # Process each event score
-                for event_info in column_mapping['events']:
-                    # Use the same event name generation logic
-                    clean_event_name = event_info['name'].strip()
-                    if '(' in clean_event_name and ')' in clean_event_name:
-                        base_name = clean_event_name.split('(')[0].strip()
-                        unit = clean_event_name.split('(')[1].split(')')[0].strip()
-                        base_event_name = f"Dryland - {base_name}"
-                        if unit:
-                            base_event_name += f" ({unit})"
-                    else:
-                        base_event_name = f"Dryland - {clean_event_name}"
-                    score_col = event_info['index']
+                    # Extract gender
+                    gender = Gender.UNKNOWN
+                    if gender_idx is not None and gender_idx < row_len:
+                        gender = parse_gender(cell_str(row[gender_idx]))
+                
+                    scores = tuple(row[score_col] if score_col < row_len else None for score_col in score_cols)
+                    athletes.append(AthleteRecord(full_name, first_name, last_name, age, team_name, gender, row_idx, scores))
+                except Exception as e:
+                    logger.warning("Error processing row %d: %s", row_idx, e)
+                    continue
+        finally:
+            # Streamed XLSX rows keep the read-only workbook open until closed, including when
+            # column detection fails before any row is read
+            if isinstance(data_rows, WorkbookRows):
+                data_rows.close()
+        
+        # Process each event column across all athletes
+        for event_pos, event_info in enumerate(column_mapping['events']):
+            score_col = event_info['index']
+            normalized_event_name = event_info['normalized']
+            age_event_by_key = event_info['age_event_by_key']
+            
+            for athlete in athletes:
+                try:
+                    score = cell_float(athlete.scores[event_pos])
+                    if score is None or score <= 0:
+                        continue
                     
-                    if score_col < len(row):
-                        score = safe_float(row[score_col])
+                    # Map gender to point system format and event name prefix
+                    gender = athlete.gender
+                    gender_for_scoring = "Men's" if gender == Gender.MALE else "Women's" if gender == Gender.FEMALE else "Men's"  # Default to Men's if unknown
+                    gender_prefix = "Men's" if gender == Gender.MALE else "Women's"
+                    
+                    # Create event key for scoring (e.g., "Men's Chin-Ups" or "Women's Dips")
+                    event_key = f"{gender_for_scoring} {normalized_event_name}"
+                    
+                    # Determine age group for this result
+                    min_age, max_age = get_age_group(athlete.age or 12)  # Default to age 12 if no age provided
+                    
+                    # Look up the age group event name for database with gender
+                    age_group_event_name = age_event_by_key[(gender_prefix, min_age)]
+                    
+                    team_name = athlete.team_name
+                    result_entry = DrylandResult(
+                        athlete.full_name,
+                        athlete.age,
+                        score,
+                        None,  # Points are filled in by the vectorized scoring pass
+                        gender,
+                        team_name[:10] if team_name else "UNKNOWN",
+                        team_name or "Unknown Team",
+                        "dryland",
+                        min_age,
+                        max_age
+                    )
+                    
+                    # Add to results using age group event name
+                    results[age_group_event_name].append(result_entry)
+                    
+                    # Save to database if meet is provided
+                    result_obj = None
+                    if meet:
+                        # Record the team and swimmer; they are bulk created after the event loop
+                        team_code = result_entry.team_code
+                        team_names.setdefault(team_code, result_entry.team_name)
+                        swimmer_meet_id = f"DRYLAND_{fast_slugify(athlete.full_name)}_{athlete.row_idx}"
+                        swimmer_rows.setdefault(swimmer_meet_id, {
+                            'team_code': team_code,
+                            'first_name': athlete.first_name,
+                            'last_name': athlete.last_name,
+                            'gender': gender,
+                            'age': athlete.age
+                        })
                         
-                        if score is not None and score > 0:
-                            # Calculate points using the scoring system
-                            scoring_system = ScoringSystem()
-                            
-                            # Normalize event name for scoring system
-                            normalized_event_name = normalize_event_name_for_scoring(clean_event_name)
-                            
-                            # Map gender to point system format
-                            gender_for_scoring = "Men's" if gender == Gender.MALE else "Women's" if gender == Gender.FEMALE else "Men's"  # Default to Men's if unknown
-                            
-                            # Create event key for scoring (e.g., "Men's Chin-Ups" or "Women's Dips")
-                            event_key = f"{gender_for_scoring} {normalized_event_name}"
-                            
-                            # Calculate points based on the scoring system
-                            points = scoring_system.calculate_points(event_key, score, age)
-                            
-                            # If no points found in scoring system, fall back to raw score
-                            if points == 0:
-                                points = score
-                            
-                            # Determine age group for this result
-                            min_age, max_age = get_age_group(age or 12)  # Default to age 12 if no age provided
-                            
-                            # Get gender prefix for event name
-                            gender_prefix = "Men's" if gender == Gender.MALE else "Women's"
-                            
-                            # Get age group display name
-                            if max_age == 99:
-                                age_display = "Open"
-                            else:
-                                age_display = str(min_age)
-                            
-                            # Create the age group event name for database with gender
-                            age_group_event_name = f"{gender_prefix} {base_event_name.replace('Dryland - ', '')} - {age_display}"
-                            
-                            result_entry = {
-                                "swimmer": full_name,
-                                "raw_age": age,
-                                "score": score,
-                                "points": points,
-                                "gender": gender,
-                                "team_code": team_name[:10] if team_name else "UNKNOWN",
-                                "team_name": team_name or "Unknown Team",
-                                "event_type": "dryland",
-                                "min_age": min_age,
-                                "max_age": max_age
-                            }
-                            
-                            # Add to results using age group event name
-                            results[age_group_event_name].append(result_entry)
-                            
-                            # Save to database if meet is provided
-                            if meet:
-                                # Get or create the team
-                                team, _ = Team.objects.get_or_create(
-                                    meet=meet,
-                                    code=result_entry["team_code"],
-                                    defaults={
-                                        'name': result_entry["team_name"],
-                                        'short_name': result_entry["team_code"]
-                                    }
-                                )
-                                
-                                # Create swimmer
-                                swimmer_obj, _ = Swimmer.objects.get_or_create(
-                                    meet=meet,
-                                    team=team,
-                                    swimmer_meet_id=f"DRYLAND_{slugify(full_name)}_{row_idx}",
-                                    defaults={
-                                        'first_name': first_name,
-                                        'last_name': last_name,
-                                        'gender': gender,
-                                        'age': age
-                                    }
-                                )
-                                
-                                # Get or create event with age group
-                                event_obj, _ = Event.objects.get_or_create(
-                                    meet=meet,
-                                    name=age_group_event_name,
-                                    defaults={
-                                        'event_number': 9000 + event_info['index'] + (min_age * 100),  # High numbers for dryland events with age group offset
-                                        'distance': 0,  # No distance for dryland
-                                        'stroke': Stroke.OTHER,
-                                        'gender': Gender.UNKNOWN,  # Mixed/Unknown
-                                        'is_relay': False,
-                                        'min_age': min_age,
-                                        'max_age': max_age
-                                    }
-                                )
-                                
-                                # Create result
-                                result = Result.objects.create(
-                                    event=event_obj,
-                                    swimmer=swimmer_obj,
-                                    final_time=score,  # Store score as "time"
-                                    final_points=points,
-                                    best_points=points
-                                )
-                                
-            except Exception as e:
-                logger.warning(f"Error processing row {row_idx}: {str(e)}")
-                continue
+                        # Record the event with age group; events are bulk created after the event loop.
+                        # Women's events are offset so both genders get distinct event numbers.
+                        gender_offset = 0 if gender_prefix == "Men's" else 5000
+                        event_rows.setdefault(age_group_event_name, {
+                            'event_number': 9000 + gender_offset + score_col + (min_age * 100),  # High numbers for dryland events with age group offset
+                            'min_age': min_age,
+                            'max_age': max_age
+                        })
+                        
+                        # Queue result for bulk insert; swimmer, event and points are attached later
+                        result_obj = Result(final_time=score)  # Store score as "time"
+                        pending_results.append((swimmer_meet_id, age_group_event_name, result_obj))
+                    
+                    score_groups[(event_key, athlete.age)].append((score, result_entry, result_obj))
+                
+                except Exception as e:
+                    logger.warning("Error processing row %d: %s", athlete.row_idx, e)
+                    continue
+        
+        if row_idx < 0:
+            raise DrylandParseError("No data rows found in Excel file")
         
-        # Sort each event's results by score (descending for dryland - higher is better)
+        # Calculate points based on the scoring system, one NumPy call per (event_key, age) group
+        for (event_key, age), group in score_groups.items():
+            group_points = scoring.calculate_points_vec(event_key, [score for score, _, _ in group], age)
+            for (score, result_entry, result_obj), points in zip(group, group_points.tolist()):
+                # If no points found in scoring system, fall back to raw score
+                if points == 0:
+                    points = score
+                result_entry.points = points
+                if result_obj is not None:
+                    result_obj.final_points = points
+                    result_obj.best_points = points
+        
+        if meet and pending_results:
+            # Create all teams in one statement, then load them back keyed by code
+            Team.objects.bulk_create(
+                [Team(meet=meet, code=code, name=name, short_name=code) for code, name in team_names.items()],
+                ignore_conflicts=True,
+                batch_size=DRYLAND_BULK_BATCH_SIZE
+            )
+            team_cache = {
+                team.code: team
+                for team in Team.objects.filter(meet=meet, code__in=list(team_names))
+            }
+            
+            # Same for swimmers, keyed by their generated meet id
+            Swimmer.objects.bulk_create(
+                [
+                    Swimmer(
+                        meet=meet,
+                        team=team_cache[info['team_code']],
+                        swimmer_meet_id=swimmer_meet_id,
+                        first_name=info['first_name'],
+                        last_name=info['last_name'],
+                        gender=info['gender'],
+                        age=info['age']
+                    )
+                    for swimmer_meet_id, info in swimmer_rows.items()
+                ],
+                ignore_conflicts=True,
+                batch_size=DRYLAND_BULK_BATCH_SIZE
+            )
+            swimmer_cache = {
+                swimmer.swimmer_meet_id: swimmer
+                for swimmer in Swimmer.objects.filter(meet=meet, swimmer_meet_id__in=list(swimmer_rows))
+            }
+            
+            # Reuse events this meet already has with the same name and age bounds, like get_or_create on the name.
+            # Event numbers are synthetic (they depend on column position), so existing events are never
+            # renamed or re-aged on a number clash. Stepping to the next number could land on another
+            # column's or age group's number, so a clashing event takes the next overflow number instead.
+            event_filter = dict(meet=meet, name__in=list(event_rows))
+            existing_events = {
+                (name, min_age, max_age): pk
+                for name, min_age, max_age, pk in Event.objects.filter(**event_filter).values_list('name', 'min_age', 'max_age', 'pk')
+            }
+            used_event_numbers = set(Event.objects.filter(meet=meet).values_list('event_number', flat=True))
+            new_events = []
+            for event_name, info in event_rows.items():
+                if (event_name, info['min_age'], info['max_age']) in existing_events:
+                    continue
+                event_number = info['event_number']
+                if event_number in used_event_numbers:
+                    event_number = max(max(used_event_numbers) + 1, DRYLAND_OVERFLOW_EVENT_NUMBER)
+                used_event_numbers.add(event_number)
+                new_events.append(Event(
+                    meet=meet,
+                    name=event_name,
+                    event_number=event_number,
+                    distance=0,  # No distance for dryland
+                    stroke=Stroke.OTHER,
+                    gender=Gender.UNKNOWN,  # Mixed/Unknown
+                    is_relay=False,
+                    min_age=info['min_age'],
+                    max_age=info['max_age']
+                ))
+            if new_events:
+                # A concurrent upload may have taken a number in the meantime; those rows are skipped, not updated
+                Event.objects.bulk_create(new_events, ignore_conflicts=True, batch_size=DRYLAND_BULK_BATCH_SIZE)
+                existing_events = {
+                    (name, min_age, max_age): pk
+                    for name, min_age, max_age, pk in Event.objects.filter(**event_filter).values_list('name', 'min_age', 'max_age', 'pk')
+                }
+            event_map = {}
+            for event_name, info in event_rows.items():
+                event_pk = existing_events.get((event_name, info['min_age'], info['max_age']))
+                if event_pk is not None:
+                    event_map[event_name] = event_pk
+            
+            results_to_create = []
+            for swimmer_meet_id, event_name, result in pending_results:
+                if event_name not in event_map:
+                    # The event's number was taken by a concurrent upload between the lookup and the insert
+                    logger.warning("Could not create dryland event %s", event_name)
+                    continue
+                result.swimmer = swimmer_cache[swimmer_meet_id]
+                result.event_id = event_map[event_name]
+                results_to_create.append(result)
+            Result.objects.bulk_create(results_to_create, batch_size=DRYLAND_BULK_BATCH_SIZE)
+        
+        # Sort each event's results by score (descending for dryland - higher is better).
+        # Callers use every entry, so this stays a full sort rather than a top-N selection.
         for event_name in results:
-            results[event_name].sort(key=lambda x: x['score'], reverse=True)
+            results[event_name].sort(key=_score_key, reverse=True)
         
-        logger.info(f"Successfully processed {len(results)} dryland events")
-        return results
+        logger.info("Successfully processed %d dryland events", len(results))
+        return {
+            event_name: [entry.to_dict() for entry in entries]
+            for event_name, entries in results.items()
+        }
         
     except Exception as e:
-        logger.error(f"Error processing dryland file: {str(e)}", exc_info=True)
+        logger.error("Error processing dryland file: %s", e, exc_info=True)
         raise 
\ No newline at end of file
@@ -1,9 +1,68 @@
 from django import forms
 from uploads.models import UploadedFile
+import codecs
 import os
-import zipfile
+import struct
 from django.core.exceptions import ValidationError
 
+# Largest accepted upload
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Extension required for each selectable file type
+_EXPECTED_EXTENSIONS = {
+    'HY3': '.hy3',
+    'ZIP': '.zip',
+}
+
+# ZIP file magic signatures; every one starts with the "PK" prefix
+_ZIP_PREFIX = b'PK'
+_ZIP_SIGNATURES = frozenset((
+    b'PK\x03\x04',  # Standard ZIP
+    b'PK\x05\x06',  # Empty ZIP
+    b'PK\x07\x08'   # Spanned ZIP
+))
+
+# End of central directory record: signature, disk numbers, entry counts, size, offset, comment length
+_EOCD_STRUCT = struct.Struct('<4s4H2LH')
+_EOCD_SIGNATURE = b'PK\x05\x06'
+_CENTRAL_DIRECTORY_SIGNATURE = b'PK\x01\x02'
+# The EOCD record is followed by at most a 64KB comment
+_EOCD_SEARCH_SIZE = _EOCD_STRUCT.size + 0xFFFF
+
+def _has_zip_central_directory(file) -> bool:
+    """
+    Check that a ZIP's end of central directory record points at a central directory.
+    
+    Only the archive tail and the first central directory header are read, instead of
+    decoding every entry like ZipFile(...).namelist() does.
+    
+    Args:
+        file: Seekable binary file object
+        
+    Returns:
+        True if the archive structure looks valid
+    """
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    tail_size = min(size, _EOCD_SEARCH_SIZE)
+    file.seek(size - tail_size)
+    tail = file.read(tail_size)
+    
+    eocd_pos = tail.rfind(_EOCD_SIGNATURE)
+    if eocd_pos < 0 or len(tail) - eocd_pos < _EOCD_STRUCT.size:
+        return False
+    
+    _, _, _, _, total_entries, cd_size, cd_offset, _ = _EOCD_STRUCT.unpack_from(tail, eocd_pos)
+    if total_entries == 0:
+        return True  # Empty archive; there is no central directory to check
+    if cd_offset == 0xFFFFFFFF:
+        return True  # ZIP64 archive; the real offset lives in the ZIP64 record
+    if cd_offset + cd_size > size:
+        return False
+    
+    file.seek(cd_offset)
+    return file.read(4) == _CENTRAL_DIRECTORY_SIGNATURE
+
 class UploadFileForm(forms.ModelForm):
     """
     Form for uploading a file using the UploadedFile model
@@ -20,16 +79,15 @@ class UploadFileForm(forms.ModelForm):
         if not file:
             raise forms.ValidationError('No file was uploaded')
 
-        if file.size > 10 * 1024 * 1024:
+        if file.size > MAX_UPLOAD_SIZE:
             raise forms.ValidationError('File size must be less than 10MB')
         
         ext = os.path.splitext(file.name)[1].lower()
         
         # Validate file extension matches selected type
-        if file_type == 'HY3' and ext != '.hy3':
-            raise forms.ValidationError('When selecting HY3 file type, you must upload a .hy3 file')
-        elif file_type == 'ZIP' and ext != '.zip':
-            raise forms.ValidationError('When selecting ZIP file type, you must upload a .zip file')
+        expected_ext = _EXPECTED_EXTENSIONS.get(file_type)
+        if expected_ext and ext != expected_ext:
+            raise forms.ValidationError(f'When selecting {file_type} file type, you must upload a {expected_ext} file')
         
         # Validate file content (magic number validation)
         if file_type == 'ZIP':
@@ -38,27 +96,13 @@ class UploadFileForm(forms.ModelForm):
                 file.seek(0)
                 # Check if it's a valid ZIP file by reading magic bytes
                 magic_bytes = file.read(4)
-                file.seek(0)  # Reset again
-                
-                # ZIP file magic signatures
-                zip_signatures = [
-                    b'PK\x03\x04',  # Standard ZIP
-                    b'PK\x05\x06',  # Empty ZIP
-                    b'PK\x07\x08'   # Spanned ZIP
-                ]
                 
-                if not any(magic_bytes.startswith(sig) for sig in zip_signatures):
+                if magic_bytes[:2] != _ZIP_PREFIX or magic_bytes not in _ZIP_SIGNATURES:
                     raise forms.ValidationError('File does not appear to be a valid ZIP archive')
                 
-                # Additional validation: try to open as ZIP
-                try:
-                    with zipfile.ZipFile(file, 'r') as zip_ref:
-                        # Just test that we can read the file list
-                        zip_ref.namelist()
-                except zipfile.BadZipFile:
+                # Additional validation: check the central directory is where the archive says it is
+                if not _has_zip_central_directory(file):
                     raise forms.ValidationError('File is corrupted or not a valid ZIP archive')
-                finally:
-                    file.seek(0)  # Reset file pointer
                     
             except Exception as e:
                 raise forms.ValidationError('Error validating ZIP file format')
@@ -67,21 +111,23 @@ class UploadFileForm(forms.ModelForm):
             # For HY3 files, check if it's a text file (basic validation)
             try:
                 file.seek(0)
-                sample = file.read(100)  # Read first 100 bytes
-                file.seek(0)  # Reset
-                
-                # Check if it's readable as text (basic check for HY3 format)
+                sample = file.read(256)  # Read first 256 bytes
+
+                # Check if it's readable as text (basic check for HY3 format); a multi-byte
+                # character split at the end of the sample is not an error
                 try:
-                    sample.decode('utf-8')
+                    codecs.utf_8_decode(sample, 'strict', False)
                 except UnicodeDecodeError:
-                    try:
-                        sample.decode('latin-1')
-                    except UnicodeDecodeError:
+                    # Not UTF-8; HY-TEK writes cp1252, so accept any single-byte text and only
+                    # reject NUL and the other low control bytes that mark a binary file
+                    if any(b < 0x09 for b in sample):
                         raise forms.ValidationError('HY3 file does not appear to be a valid text file')
-                        
+
             except Exception as e:
                 raise forms.ValidationError('Error validating HY3 file format')
         
+        # Validation reads move the file pointer; rewind once for whoever saves the file
+        file.seek(0)
         return file
 
 
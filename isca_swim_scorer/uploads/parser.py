@@ -3,28 +3,55 @@ import os
 import logging
 import zipfile
 import tempfile
-from typing import Dict, List
+from collections import defaultdict
+from typing import Dict, List, Optional
+import numpy as np
 from django.db import transaction
 from django.utils.text import slugify
 
 from meets.models import Meet, Event, Team, Swimmer, Result
 from uploads.models import UploadedFile
-from core.utils import format_swim_time, parse_swim_time
+from core.utils import format_swim_time
 from scoring.scoring_system import ScoringSystem
 from .dryland_parser import process_dryland_file, DrylandParseError
 
 # Add custom parser path and import
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "hytek-parser"))
+HYTEK_PARSER_PATH = os.path.join(os.path.dirname(__file__), "hytek-parser")
+if HYTEK_PARSER_PATH not in sys.path:
+    sys.path.insert(0, HYTEK_PARSER_PATH)
 from hytek_parser import hy3_parser
 from hytek_parser.hy3.enums import Course, Stroke, Gender
 
 logger = logging.getLogger(__name__)
 
+# Team code used for swimmers whose HY3 entry has no team code
+UNATTACHED_TEAM_CODE = "UNA"
+
+# Rows per INSERT when writing an HY3 event's swimmers and results
+HYTEK_BULK_BATCH_SIZE = 2000
+
+# Gender prefixes for event names, used by get_event_name; other genders get no prefix
+_GENDER_NAMES = {
+    Gender.MALE: "Men's",
+    Gender.FEMALE: "Women's",
+}
+
+# Swimmer gender enum members mapped to the names stored on Swimmer rows
+_GENDER_CODES = {gender: gender.name for gender in Gender}
+
+# Display names for individual event strokes, used by get_event_name
+_STROKE_NAMES = {
+    Stroke.FREESTYLE: "Freestyle",
+    Stroke.BACKSTROKE: "Backstroke",
+    Stroke.BREASTSTROKE: "Breaststroke",
+    Stroke.BUTTERFLY: "Butterfly",
+    Stroke.MEDLEY: "Individual Medley"
+}
+
 def get_event_name(event, course: str) -> str:
     """Get the formatted event name for display and point table lookup"""
     # Get gender text
-    gender_text = "Men's" if event.gender == Gender.MALE else \
-                 "Women's" if event.gender == Gender.FEMALE else ""
+    gender_text = _GENDER_NAMES.get(event.gender, "")
     
     # Handle relay events
     if event.relay:
@@ -38,13 +65,7 @@ def get_event_name(event, course: str) -> str:
         return f"{gender_text} {event.distance} Individual Medley ({course})"
     
     # For individual events, format properly
-    stroke_str = {
-        Stroke.FREESTYLE: "Freestyle",
-        Stroke.BACKSTROKE: "Backstroke",
-        Stroke.BREASTSTROKE: "Breaststroke",
-        Stroke.BUTTERFLY: "Butterfly",
-        Stroke.MEDLEY: "Individual Medley"
-    }.get(event.stroke, "Unknown")
+    stroke_str = _STROKE_NAMES.get(event.stroke, "Unknown")
     return f"{gender_text} {event.distance} {stroke_str} ({course})"
 
 def extract_hy3_from_zip(zip_path: str) -> str:
@@ -79,7 +100,83 @@ def extract_hy3_from_zip(zip_path: str) -> str:
         
         return os.path.join(temp_dir, hy3_files[0])
 
-@transaction.atomic
+def _write_hytek_event(meet: Meet, event_row: Event, team_names: Dict[str, str], team_map: Dict[str, int],
+                       swimmer_rows: Dict[str, Swimmer], swimmer_teams: Dict[str, str],
+                       swimmer_map: Dict[str, int], pending_results: List[tuple]) -> None:
+    """
+    Write one HY3 event with its new teams, new swimmers and results using bulk_create.
+    
+    Args:
+        meet: Meet the rows belong to
+        event_row: Unsaved Event for this event
+        team_names: Every team code seen so far mapped to its name
+        team_map: Team code to pk for teams already written; updated in place
+        swimmer_rows: Unsaved swimmers first seen in this event, keyed by swimmer_meet_id
+        swimmer_teams: Swimmer meet id to team code
+        swimmer_map: Swimmer meet id to pk for swimmers already written; updated in place
+        pending_results: (swimmer_meet_id, unsaved Result) pairs for this event
+    """
+    # Plain insert, like Event.objects.create: an event already in the meet raises
+    # IntegrityError and rolls the upload back instead of duplicating its results
+    event_row.save(force_insert=True)
+    event_pk = event_row.pk
+
+    # Teams first seen on an entry; existing ones are kept as they are, like get_or_create
+    new_team_codes = [code for code in team_names if code not in team_map]
+    if new_team_codes:
+        Team.objects.bulk_create(
+            [Team(meet=meet, code=code, name=team_names[code], short_name=code) for code in new_team_codes],
+            ignore_conflicts=True,
+            batch_size=HYTEK_BULK_BATCH_SIZE
+        )
+        team_map.update(Team.objects.filter(meet=meet, code__in=new_team_codes).values_list('code', 'pk'))
+
+    # Swimmers are upserted on (swimmer_meet_id, meet) so re-uploads refresh their details
+    if swimmer_rows:
+        for swimmer_meet_id, swimmer_obj in swimmer_rows.items():
+            swimmer_obj.team_id = team_map[swimmer_teams[swimmer_meet_id]]
+        Swimmer.objects.bulk_create(
+            list(swimmer_rows.values()),
+            update_conflicts=True,
+            unique_fields=['swimmer_meet_id', 'meet'],
+            update_fields=['team', 'first_name', 'last_name', 'gender', 'age'],
+            batch_size=HYTEK_BULK_BATCH_SIZE
+        )
+        swimmer_map.update(
+            Swimmer.objects.filter(meet=meet, swimmer_meet_id__in=list(swimmer_rows)).values_list('swimmer_meet_id', 'pk')
+        )
+
+    # Link results by primary key; no model instances are needed for the foreign keys
+    for swimmer_meet_id, result in pending_results:
+        result.swimmer_id = swimmer_map[swimmer_meet_id]
+        result.event_id = event_pk
+    Result.objects.bulk_create([result for _, result in pending_results], batch_size=HYTEK_BULK_BATCH_SIZE)
+
+def _score_hytek_entries(scoring: ScoringSystem, event_name: str, event_max_age: Optional[int],
+                         point_ages: List[Optional[int]], entry_times: List[tuple]) -> np.ndarray:
+    """
+    Score every entry of an HY3 event with one vectorized call per point age.
+    
+    Args:
+        scoring: ScoringSystem holding the cached point tables
+        event_name: Event name used as the point table key
+        event_max_age: Event max age, used when an entry has no age
+        point_ages: Age to score each entry with, or None
+        entry_times: (prelim, swim-off, finals) seconds for each entry, 0 when missing
+        
+    Returns:
+        Array with one (prelim, swim-off, final) points row per entry
+    """
+    times = np.array(entry_times, dtype=np.float64).reshape(-1, 3)
+    points = np.zeros_like(times)
+    
+    rows_by_age = defaultdict(list)
+    for row, point_age in enumerate(point_ages):
+        rows_by_age[point_age].append(row)
+    for point_age, rows in rows_by_age.items():
+        points[rows] = scoring.calculate_points_vec(event_name, times[rows], point_age, event_max_age)
+    return points
+
 def process_hytek_file(file_path: str, meet: Meet = None) -> Dict[str, List[dict]]:
     """
     Process a Hytek file and return organized results.
@@ -103,7 +200,6 @@ def process_hytek_file(file_path: str, meet: Meet = None) -> Dict[str, List[dict
         # Parse the file
         parsed_file = hy3_parser.parse_hy3(file_path)
         events = parsed_file.meet.events
-        event_ids = list(events.keys())
         
         # Get the meet's course
         meet_course = parsed_file.meet.course
@@ -112,146 +208,180 @@ def process_hytek_file(file_path: str, meet: Meet = None) -> Dict[str, List[dict
         results = {}
         scoring = ScoringSystem()
 
-        for event_id in event_ids:
-            event = events[event_id]
-            
-            # Skip relay events completely
-            if event.relay:
-                logger.info(f"Skipping relay event: {event.number}")
-                continue
-                
-            event_name = get_event_name(event, meet_course.name)
-            event_results = []
+        # Database rows are collected per event and written with bulk_create when the event ends;
+        # the maps hold primary keys of rows already written so later events can link to them
+        team_names: Dict[str, str] = {}
+        swimmer_teams: Dict[str, str] = {}
+        team_map: Dict[str, int] = {}
+        swimmer_map: Dict[str, int] = {}
+
+        # Fallback for entries whose team code isn't in the file's team list; built once, not per lookup
+        unknown_team = Team(name="Unknown Team")
+        file_teams = parsed_file.meet.teams
 
-            # Create the event in database if meet is provided
-            event_obj = None
+        # Only the database work runs in a transaction; parsing above holds no connection or locks
+        with transaction.atomic():
             if meet:
-                event_obj = Event.objects.create(
-                    meet=meet,
-                    event_number=event.number,
-                    name=event_name,
-                    distance=event.distance,
-                    stroke=event.stroke.name,
-                    gender=event.gender.value,
-                    is_relay=event.relay,
-                    min_age=event.age_min,
-                    max_age=event.age_max
+                # Upsert every team listed in the file up front; codes only seen on entries are added per event
+                team_names.update((code, team_data.name) for code, team_data in parsed_file.meet.teams.items())
+                Team.objects.bulk_create(
+                    [Team(meet=meet, code=code, name=name, short_name=code) for code, name in team_names.items()],
+                    update_conflicts=True,
+                    unique_fields=['code', 'meet'],
+                    update_fields=['name', 'short_name'],
+                    batch_size=500
                 )
+                team_map.update(Team.objects.filter(meet=meet, code__in=list(team_names)).values_list('code', 'pk'))
 
-            for entry in event.entries:
-                swimmer = entry.swimmers[0]
-                swimmer_name = f"{swimmer.first_name} {swimmer.middle_initial + ' ' if swimmer.middle_initial else ''}{swimmer.last_name}"
-                
-                # Convert gender to string
-                gender = swimmer.gender
-                if isinstance(gender, Gender):
-                    gender = gender.name
+            for event in events.values():
+            
+                # Skip relay events completely
+                if event.relay:
+                    logger.info(f"Skipping relay event: {event.number}")
+                    continue
                 
-                # Format times for display - times are already in seconds
-                prelim_time = format_swim_time(entry.prelim_time) if entry.prelim_time and entry.prelim_time > 0 else "-"
-                swimoff_time = format_swim_time(entry.swimoff_time) if entry.swimoff_time and entry.swimoff_time > 0 else "-"
-                final_time = format_swim_time(entry.finals_time) if entry.finals_time and entry.finals_time > 0 else "-"
+                event_name = get_event_name(event, meet_course.name)
+                event_results = []
+                # Raw final time of each entry in event_results, used as its sort key
+                final_sort_keys = []
+                # Scoring inputs for each entry in event_results; the event is scored in one pass after its entries
+                point_ages = []
+                entry_times = []
+
+                # Record the event if meet is provided; it is written with its results when the event ends
+                event_row = None
+                swimmer_rows: Dict[str, Swimmer] = {}
+                pending_results: List[tuple] = []
+                if meet:
+                    event_row = Event(
+                        meet=meet,
+                        event_number=event.number,
+                        name=event_name,
+                        distance=event.distance,
+                        stroke=event.stroke.name,
+                        gender=event.gender.value,
+                        is_relay=event.relay,
+                        min_age=event.age_min,
+                        max_age=event.age_max
+                    )
+
+                for entry in event.entries:
+                    swimmer = entry.swimmers[0]
+                    if swimmer.middle_initial:
+                        swimmer_name = swimmer.first_name + ' ' + swimmer.middle_initial + ' ' + swimmer.last_name
+                    else:
+                        swimmer_name = swimmer.first_name + ' ' + swimmer.last_name
                 
-                # Calculate points using best_time
-                point_age = None  # Don't use age for points in relay events
-                if not event.relay:
-                    point_age = entry.swimmers[0].age if entry.swimmers[0].age and entry.swimmers[0].age > 0 else None
+                    # Convert gender to string; values that are already strings pass through
+                    gender = _GENDER_CODES.get(swimmer.gender, swimmer.gender)
+                    team_code = swimmer.team_code
+                    team_name = file_teams.get(team_code, unknown_team).name
+                    swimmer_meet_id = str(swimmer.meet_id)
                 
-                # Determine best time
-                best_time = None
-                if entry.finals_time and entry.finals_time > 0:
-                    best_time = entry.finals_time
-                elif entry.prelim_time and entry.prelim_time > 0:
-                    best_time = entry.prelim_time
-                elif entry.swimoff_time and entry.swimoff_time > 0:
-                    best_time = entry.swimoff_time
+                    # Format times for display - times are already in seconds
+                    prelim_time = format_swim_time(entry.prelim_time) if entry.prelim_time and entry.prelim_time > 0 else "-"
+                    swimoff_time = format_swim_time(entry.swimoff_time) if entry.swimoff_time and entry.swimoff_time > 0 else "-"
+                    final_time = format_swim_time(entry.finals_time) if entry.finals_time and entry.finals_time > 0 else "-"
                 
-                # Calculate points
-                points = None
-                if best_time:
-                    points = round(scoring.calculate_points(event_name, best_time, point_age, event.age_max, gender), 2)
+                    # Calculate points using best_time
+                    point_age = None  # Don't use age for points in relay events
+                    if not event.relay:
+                        point_age = swimmer.age if swimmer.age and swimmer.age > 0 else None
                 
-                result_entry = {
-                    "swimmer": swimmer_name,
-                    "raw_age": point_age,
-                    "prelim_time": prelim_time,
-                    "swimoff_time": swimoff_time,
-                    "final_time": final_time,
-                    "points": points,
-                    "gender": gender,
-                    "team_code": entry.swimmers[0].team_code,
-                    "team_name": parsed_file.meet.teams.get(entry.swimmers[0].team_code, Team(name="Unknown Team")).name,
-                    "swimmer_meet_id": str(entry.swimmers[0].meet_id),
-                    "usa_swimming_id": entry.swimmers[0].usa_swimming_id
-                }
-                event_results.append(result_entry)
+                    result_entry = {
+                        "swimmer": swimmer_name,
+                        "raw_age": point_age,
+                        "prelim_time": prelim_time,
+                        "swimoff_time": swimoff_time,
+                        "final_time": final_time,
+                        "points": None,  # Filled in once the whole event is scored
+                        "gender": gender,
+                        "team_code": team_code,
+                        "team_name": team_name,
+                        "swimmer_meet_id": swimmer_meet_id,
+                        "usa_swimming_id": swimmer.usa_swimming_id
+                    }
+                    # Keep the raw final time so sorting needn't re-parse the display string
+                    event_results.append(result_entry)
+                    final_sort_keys.append(entry.finals_time if entry.finals_time and entry.finals_time > 0 else float('inf'))
+                    point_ages.append(point_age)
+                    entry_times.append((entry.prelim_time or 0, entry.swimoff_time or 0, entry.finals_time or 0))
 
-                # Save to database if meet is provided
-                if meet and event_obj:
-                    # Get or create the team
-                    team, _ = Team.objects.get_or_create(
-                        meet=meet,
-                        code=entry.swimmers[0].team_code,
-                        defaults={
-                            'name': parsed_file.meet.teams.get(entry.swimmers[0].team_code, "Unknown Team").name,
-                            'short_name': entry.swimmers[0].team_code
-                        }
-                    )
+                    # Queue database rows if meet is provided
+                    if meet:
+                        # Record the team; new teams are bulk created when the event ends
+                        if team_code:
+                            team_names.setdefault(team_code, team_name)
+                        else:
+                            # Swimmers without a team code go on a shared unattached team
+                            team_code = UNATTACHED_TEAM_CODE
+                            team_names.setdefault(team_code, "Unattached")
 
-                    if event.relay:
-                        # For relay events, create a special swimmer entry with team name
-                        swimmer_obj, _ = Swimmer.objects.get_or_create(
-                            meet=meet,
-                            team=team,
-                            swimmer_meet_id=f"RELAY_{entry.swimmers[0].team_code}_{event.number}",
-                            defaults={
-                                'first_name': team.name,
-                                'last_name': f"Relay {event.number}",
-                                'gender': gender,
-                                'age': None  # No age for relay teams
-                            }
-                        )
-                    else:
-                        # For individual events, create normal swimmer entry
-                        swimmer_obj, _ = Swimmer.objects.get_or_create(
-                            meet=meet,
-                            team=team,
-                            swimmer_meet_id=entry.swimmers[0].meet_id,
-                            defaults={
-                                'first_name': entry.swimmers[0].first_name,
-                                'last_name': entry.swimmers[0].last_name,
-                                'gender': gender,
-                                'age': entry.swimmers[0].age if entry.swimmers[0].age and entry.swimmers[0].age > 0 else None
-                            }
-                        )
+                        if event.relay:
+                            # For relay events, create a special swimmer entry with team name
+                            swimmer_meet_id = f"RELAY_{team_code}_{event.number}"
+                            if swimmer_meet_id not in swimmer_map:
+                                swimmer_rows.setdefault(swimmer_meet_id, Swimmer(
+                                    meet=meet,
+                                    swimmer_meet_id=swimmer_meet_id,
+                                    first_name=team_names[team_code],
+                                    last_name=f"Relay {event.number}",
+                                    gender=gender,
+                                    age=None  # No age for relay teams
+                                ))
+                        else:
+                            # For individual events, create normal swimmer entry
+                            if swimmer_meet_id not in swimmer_map:
+                                swimmer_rows.setdefault(swimmer_meet_id, Swimmer(
+                                    meet=meet,
+                                    swimmer_meet_id=swimmer_meet_id,
+                                    first_name=swimmer.first_name,
+                                    last_name=swimmer.last_name,
+                                    gender=gender,
+                                    age=swimmer.age if swimmer.age and swimmer.age > 0 else None
+                                ))
+                        # Remember the team code so the swimmer can be linked once teams exist
+                        swimmer_teams.setdefault(swimmer_meet_id, team_code)
 
-                    # Create the result
-                    result = Result.objects.create(
-                        event=event_obj,
-                        swimmer=swimmer_obj,
-                        prelim_time=entry.prelim_time,
-                        swim_off_time=entry.swimoff_time,
-                        final_time=entry.finals_time
-                    )
+                        # Build the result; points are set once the event is scored, swimmer and event when it is written
+                        result = Result(
+                            prelim_time=entry.prelim_time,
+                            swim_off_time=entry.swimoff_time,
+                            final_time=entry.finals_time
+                        )
+                        pending_results.append((swimmer_meet_id, result))
 
-                    # Calculate points for each time
-                    if result.prelim_time:
-                        result.prelim_points = scoring.calculate_points(event_name, result.prelim_time, point_age, event.age_max, gender)
-                    if result.swim_off_time:
-                        result.swim_off_points = scoring.calculate_points(event_name, result.swim_off_time, point_age, event.age_max, gender)
-                    if result.final_time:
-                        result.final_points = scoring.calculate_points(event_name, result.final_time, point_age, event.age_max, gender)
+                # Score every entry of the event at once; rows line up with event_results
+                entry_points = _score_hytek_entries(scoring, event_name, event.age_max, point_ages, entry_times).tolist()
+                for row, (prelim_points, swimoff_points, final_points) in enumerate(entry_points):
+                    # Display points come from the best time: finals, then prelims, then swim-off;
+                    # only positive times count, matching the display times and the sort key
+                    prelim_seconds, swimoff_seconds, finals_seconds = entry_times[row]
+                    if finals_seconds > 0:
+                        event_results[row]["points"] = round(final_points, 2)
+                    elif prelim_seconds > 0:
+                        event_results[row]["points"] = round(prelim_points, 2)
+                    elif swimoff_seconds > 0:
+                        event_results[row]["points"] = round(swimoff_points, 2)
+                
+                    if meet:
+                        result = pending_results[row][1]
+                        result.prelim_points = prelim_points
+                        result.swim_off_points = swimoff_points
+                        result.final_points = final_points
+                        result.best_points = max(prelim_points, swimoff_points, final_points)
 
-                    result.best_points = max(result.prelim_points, result.swim_off_points, result.final_points)
-                    result.save()
+                # Write this event's rows now so only one event's ORM objects are held at a time
+                if event_row is not None:
+                    _write_hytek_event(
+                        meet, event_row, team_names, team_map, swimmer_rows, swimmer_teams, swimmer_map, pending_results
+                    )
 
-            # Sort by final time, ignoring missing or zero times
-            event_results.sort(
-                key=lambda x: float('inf') if x['final_time'] == '-' else parse_swim_time(x['final_time'])
-            )
+                # Sort by final time, ignoring missing or zero times; sorting indices avoids a (key, entry) pair per row
+                order = sorted(range(len(event_results)), key=final_sort_keys.__getitem__)
                 
-            results[event_name] = event_results
-            
+                results[event_name] = [event_results[i] for i in order]
+
         logger.info(f"Successfully processed {len(results)} events")
         return results
         
@@ -281,7 +411,6 @@ def determine_file_type(file_path: str) -> str:
     else:
         return 'unknown'
 
-@transaction.atomic
 def process_uploaded_file(file_path: str, file_type: str, meet: Meet = None) -> Dict[str, List[dict]]:
     """
     Main file processing router that handles different file types
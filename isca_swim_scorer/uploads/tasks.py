@@ -4,7 +4,9 @@ from typing import Optional, Dict, Any
 from django.db import transaction
 from django.db.utils import OperationalError
 from django.db import connection
+from django.db.models import Prefetch
 import tempfile
+import io
 import os
 import csv
 import zipfile
@@ -20,6 +22,14 @@ from django.utils.text import slugify
 
 logger = logging.getLogger(__name__)
 
+# Write buffer for export files, so rows reach the disk in large writes instead of one small write per few rows
+CSV_EXPORT_BUFFER_SIZE = 1 << 20  # 1MB
+
+# Process umask, read once at import (os.umask can only be read by setting it), so exports get
+# the same permissions a plain open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 @shared_task
 def debug_shared_task():
     logger.info("Debug task executed successfully")
@@ -93,11 +103,12 @@ def process_uploaded_file_task(self, file_id: int, meet_id: Optional[int] = None
             except (ValueError, IndexError):
                 pass
 
-            # Generate a unique slug
+            # Generate a unique slug; fetch every taken variant in one query instead of probing one by one
             base_slug = slugify(meet_name)
+            taken_slugs = set(Meet.objects.filter(slug__startswith=base_slug).values_list('slug', flat=True))
             slug = base_slug
             counter = 1
-            while Meet.objects.filter(slug=slug).exists():
+            while slug in taken_slugs:
                 slug = f"{base_slug}-{counter}"
                 counter += 1
 
@@ -112,9 +123,9 @@ def process_uploaded_file_task(self, file_id: int, meet_id: Optional[int] = None
             
             logger.info(f"Created new meet: {meet.name} (ID: {meet.id})")
             
-            # Link the uploaded file to the meet
+            # Link the uploaded file to the meet before processing starts, so the meet is never left orphaned
             uploaded_file.meet = meet
-            uploaded_file.save()
+            uploaded_file.save(update_fields=['meet', 'updated_at'])
         
         # Process the file
         try:
@@ -168,14 +179,14 @@ def process_uploaded_file_task(self, file_id: int, meet_id: Optional[int] = None
             logger.error(f"Error processing file {file_id}: {str(e)}")
             # Update the uploaded file with the error
             uploaded_file.processing_errors = str(e)
-            uploaded_file.save()
+            uploaded_file.save(update_fields=['processing_errors', 'updated_at'])
             raise
         
         # Update the uploaded file status
         try:
             with transaction.atomic():
                 uploaded_file.is_processed = True
-                uploaded_file.save()
+                uploaded_file.save(update_fields=['is_processed', 'updated_at'])
         except OperationalError as e:
             logger.error(f"Database error while updating file status: {str(e)}")
             # Retry the task with exponential backoff
@@ -219,117 +230,124 @@ def export_meet_results_task(self, meet_id: int) -> Dict[str, Any]:
         zip_filename = f"meet_{meet_id}_results.zip"
         zip_path = os.path.join(export_dir, zip_filename)
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            by_event_file = os.path.join(temp_dir, "results_by_event.csv")
-            by_swimmer_file = os.path.join(temp_dir, "results_by_swimmer.csv")
+        # Write the CSVs straight into a temporary archive next to the final one; no temporary CSV copies are
+        # written and read back, and zip_path only appears (via an atomic rename) once the archive is complete
+        part_file = tempfile.NamedTemporaryFile(
+            'wb', dir=export_dir, prefix=f"{zip_filename}.", suffix='.part', delete=False, buffering=CSV_EXPORT_BUFFER_SIZE
+        )
+        part_path = part_file.name
+        try:
+            with part_file, zipfile.ZipFile(part_file, 'w') as zipf:
+                # Write results by event
+                with io.TextIOWrapper(zipf.open('results_by_event.csv', 'w'), encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(['Event', 'Swimmer', 'Age', 'Team', 'Prelim Time/Score', 'Prelim Points',
+                                     'Swimoff Time/Score', 'Swimoff Points', 'Final Time/Score', 'Final Points', 'Best Points'])
+                    # Prefetch each list's results already ordered; calling order_by() on a prefetched manager re-queries per row
+                    for event in meet.events.select_related('meet').prefetch_related(
+                        Prefetch('results', queryset=Result.objects.select_related('swimmer__team').order_by('final_place', 'prelim_place', 'swim_off_place'))
+                    ).order_by('event_number'):
+                        for result in event.results.all():
+                            # Check if this is a dryland event
+                            is_dryland = event.name.startswith('Dryland -') or event.stroke == 'OTH'
 
-            # Write results by event
-            with open(by_event_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Event', 'Swimmer', 'Age', 'Team', 'Prelim Time/Score', 'Prelim Points',
-                                 'Swimoff Time/Score', 'Swimoff Points', 'Final Time/Score', 'Final Points', 'Best Points'])
-                # Optimize queries with select_related and prefetch_related
-                for event in meet.events.select_related('meet').prefetch_related(
-                    'results__swimmer__team'
-                ).order_by('event_number'):
-                    for result in event.results.all().order_by('final_place', 'prelim_place', 'swim_off_place'):
-                        # Check if this is a dryland event
-                        is_dryland = event.name.startswith('Dryland -') or event.stroke == 'OTH'
-                        
-                        # Format time/score based on event type
-                        def format_time_or_score(value):
-                            if not value or value <= 0:
-                                return '-'
-                            if is_dryland:
-                                return format_dryland_score(value)
-                            else:
-                                return format_swim_time(value)
-                        
-                        writer.writerow([
-                            event.name,
-                            result.swimmer.full_name,
-                            result.swimmer.age or 'N/A',
-                            result.swimmer.team.name,
-                            format_time_or_score(result.prelim_time),
-                            f"{result.prelim_points:.2f}" if result.prelim_points > 0 else ('0.00' if result.prelim_time and result.prelim_time > 0 else '-'),
-                            format_time_or_score(result.swim_off_time),
-                            f"{result.swim_off_points:.2f}" if result.swim_off_points > 0 else ('0.00' if result.swim_off_time and result.swim_off_time > 0 else '-'),
-                            format_time_or_score(result.final_time),
-                            f"{result.final_points:.2f}" if result.final_points > 0 else ('0.00' if result.final_time and result.final_time > 0 else '-'),
-                            f"{result.best_points:.2f}" if result.best_points > 0 else ('0.00' if (result.prelim_time and result.prelim_time > 0) or (result.swim_off_time and result.swim_off_time > 0) or (result.final_time and result.final_time > 0) else '-')
-                        ])
+                            # Format time/score based on event type
+                            def format_time_or_score(value):
+                                if not value or value <= 0:
+                                    return '-'
+                                if is_dryland:
+                                    return format_dryland_score(value)
+                                else:
+                                    return format_swim_time(value)
 
-            # Write results by swimmer
-            with open(by_swimmer_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Swimmer', 'Age', 'Team', 'Event', 'Prelim Time/Score', 'Prelim Points',
-                                 'Swimoff Time/Score', 'Swimoff Points', 'Final Time/Score', 'Final Points', 'Best Points'])
-                # Optimize queries with select_related and prefetch_related
-                for swimmer in meet.swimmers.select_related('team').prefetch_related(
-                    'results__event'
-                ).order_by('last_name', 'first_name'):
-                    for result in swimmer.results.all().order_by('event__event_number'):
-                        # Only include results that have points
-                        has_points = any([
-                            result.prelim_points and result.prelim_points > 0,
-                            result.swim_off_points and result.swim_off_points > 0,
-                            result.final_points and result.final_points > 0,
-                            result.best_points and result.best_points > 0
-                        ])
-                        
-                        if not has_points:
-                            continue
-                        
-                        # Check if this is a dryland event
-                        event = result.event
-                        is_dryland = event.name.startswith('Dryland -') or event.stroke == 'OTH'
-                        
-                        # Format time/score based on event type
-                        def format_time_or_score(value):
-                            if not value or value <= 0:
-                                return '-'
-                            if is_dryland:
-                                return format_dryland_score(value)
-                            else:
-                                return format_swim_time(value)
-                        
-                        # Format age group for this event
-                        age_group = ""
-                        if event.min_age and event.max_age:
-                            # If max_age is unrealistically high (like 109), treat as open
-                            if event.max_age >= 99:
-                                age_group = f"{event.min_age} & Over" if event.min_age > 1 else "Open"
-                            elif event.min_age == event.max_age:
-                                age_group = f"{event.min_age}"
+                            writer.writerow([
+                                event.name,
+                                result.swimmer.full_name,
+                                result.swimmer.age or 'N/A',
+                                result.swimmer.team.name,
+                                format_time_or_score(result.prelim_time),
+                                f"{result.prelim_points:.2f}" if result.prelim_points > 0 else ('0.00' if result.prelim_time and result.prelim_time > 0 else '-'),
+                                format_time_or_score(result.swim_off_time),
+                                f"{result.swim_off_points:.2f}" if result.swim_off_points > 0 else ('0.00' if result.swim_off_time and result.swim_off_time > 0 else '-'),
+                                format_time_or_score(result.final_time),
+                                f"{result.final_points:.2f}" if result.final_points > 0 else ('0.00' if result.final_time and result.final_time > 0 else '-'),
+                                f"{result.best_points:.2f}" if result.best_points > 0 else ('0.00' if (result.prelim_time and result.prelim_time > 0) or (result.swim_off_time and result.swim_off_time > 0) or (result.final_time and result.final_time > 0) else '-')
+                            ])
+
+                # Write results by swimmer
+                with io.TextIOWrapper(zipf.open('results_by_swimmer.csv', 'w'), encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(['Swimmer', 'Age', 'Team', 'Event', 'Prelim Time/Score', 'Prelim Points',
+                                     'Swimoff Time/Score', 'Swimoff Points', 'Final Time/Score', 'Final Points', 'Best Points'])
+                    # Prefetch each list's results already ordered; calling order_by() on a prefetched manager re-queries per row
+                    for swimmer in meet.swimmers.select_related('team').prefetch_related(
+                        Prefetch('results', queryset=Result.objects.select_related('event').order_by('event__event_number'))
+                    ).order_by('last_name', 'first_name'):
+                        for result in swimmer.results.all():
+                            # Only include results that have points
+                            has_points = any([
+                                result.prelim_points and result.prelim_points > 0,
+                                result.swim_off_points and result.swim_off_points > 0,
+                                result.final_points and result.final_points > 0,
+                                result.best_points and result.best_points > 0
+                            ])
+
+                            if not has_points:
+                                continue
+
+                            # Check if this is a dryland event
+                            event = result.event
+                            is_dryland = event.name.startswith('Dryland -') or event.stroke == 'OTH'
+
+                            # Format time/score based on event type
+                            def format_time_or_score(value):
+                                if not value or value <= 0:
+                                    return '-'
+                                if is_dryland:
+                                    return format_dryland_score(value)
+                                else:
+                                    return format_swim_time(value)
+
+                            # Format age group for this event
+                            age_group = ""
+                            if event.min_age and event.max_age:
+                                # If max_age is unrealistically high (like 109), treat as open
+                                if event.max_age >= 99:
+                                    age_group = f"{event.min_age} & Over" if event.min_age > 1 else "Open"
+                                elif event.min_age == event.max_age:
+                                    age_group = f"{event.min_age}"
+                                else:
+                                    age_group = f"{event.min_age}-{event.max_age}"
+                            elif event.min_age:
+                                age_group = f"{event.min_age} & Over"
+                            elif event.max_age and event.max_age < 99:
+                                age_group = f"Under {event.max_age}"
                             else:
-                                age_group = f"{event.min_age}-{event.max_age}"
-                        elif event.min_age:
-                            age_group = f"{event.min_age} & Over"
-                        elif event.max_age and event.max_age < 99:
-                            age_group = f"Under {event.max_age}"
-                        else:
-                            age_group = "Open"
-                        
-                        event_name_with_age = f"{event.name} - {age_group}"
-                            
-                        writer.writerow([
-                            swimmer.full_name,
-                            swimmer.age or 'N/A',
-                            swimmer.team.name,
-                            event_name_with_age,
-                            format_time_or_score(result.prelim_time),
-                            f"{result.prelim_points:.2f}" if result.prelim_points > 0 else ('0.00' if result.prelim_time and result.prelim_time > 0 else '-'),
-                            format_time_or_score(result.swim_off_time),
-                            f"{result.swim_off_points:.2f}" if result.swim_off_points > 0 else ('0.00' if result.swim_off_time and result.swim_off_time > 0 else '-'),
-                            format_time_or_score(result.final_time),
-                            f"{result.final_points:.2f}" if result.final_points > 0 else ('0.00' if result.final_time and result.final_time > 0 else '-'),
-                            f"{result.best_points:.2f}" if result.best_points > 0 else ('0.00' if (result.prelim_time and result.prelim_time > 0) or (result.swim_off_time and result.swim_off_time > 0) or (result.final_time and result.final_time > 0) else '-')
-                        ])
+                                age_group = "Open"
 
-            # Create zip file
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                zipf.write(by_event_file, os.path.basename(by_event_file))
-                zipf.write(by_swimmer_file, os.path.basename(by_swimmer_file))
+                            event_name_with_age = f"{event.name} - {age_group}"
+
+                            writer.writerow([
+                                swimmer.full_name,
+                                swimmer.age or 'N/A',
+                                swimmer.team.name,
+                                event_name_with_age,
+                                format_time_or_score(result.prelim_time),
+                                f"{result.prelim_points:.2f}" if result.prelim_points > 0 else ('0.00' if result.prelim_time and result.prelim_time > 0 else '-'),
+                                format_time_or_score(result.swim_off_time),
+                                f"{result.swim_off_points:.2f}" if result.swim_off_points > 0 else ('0.00' if result.swim_off_time and result.swim_off_time > 0 else '-'),
+                                format_time_or_score(result.final_time),
+                                f"{result.final_points:.2f}" if result.final_points > 0 else ('0.00' if result.final_time and result.final_time > 0 else '-'),
+                                f"{result.best_points:.2f}" if result.best_points > 0 else ('0.00' if (result.prelim_time and result.prelim_time > 0) or (result.swim_off_time and result.swim_off_time > 0) or (result.final_time and result.final_time > 0) else '-')
+                            ])
+
+            # Temporary files are created owner-only; give the export the permissions a plain open() would
+            os.chmod(part_path, 0o666 & ~_UMASK)
+            os.replace(part_path, zip_path)
+        finally:
+            # Never leave a partial archive behind; after a successful rename there is nothing to remove
+            if os.path.exists(part_path):
+                os.remove(part_path)
 
         return {'status': 'success', 'zip_path': zip_path, 'zip_filename': zip_filename}
     except Exception as e:
@@ -364,11 +382,11 @@ def export_combined_results_task(self) -> Dict[str, Any]:
                 # Track duplicates for filtering
                 seen_results = set()
                 
-                # Optimize queries with select_related and prefetch_related
+                # Prefetch each list's results already ordered; calling order_by() on a prefetched manager re-queries per row
                 for event in Event.objects.select_related('meet').prefetch_related(
-                    'results__swimmer__team'
+                    Prefetch('results', queryset=Result.objects.select_related('swimmer__team').order_by('final_place', 'prelim_place', 'swim_off_place'))
                 ).order_by('meet__start_date', 'meet__name', 'event_number'):
-                    for result in event.results.all().order_by('final_place', 'prelim_place', 'swim_off_place'):
+                    for result in event.results.all():
                         # Check if swimmer has any valid time - skip if no results
                         has_valid_time = (
                             (result.prelim_time and result.prelim_time > 0) or 
@@ -435,11 +453,11 @@ def export_combined_results_task(self) -> Dict[str, Any]:
                 # Track duplicates for filtering
                 seen_swimmer_results = set()
                 
-                # Optimize queries with select_related and prefetch_related
+                # Prefetch each list's results already ordered; calling order_by() on a prefetched manager re-queries per row
                 for swimmer in Swimmer.objects.select_related('team').prefetch_related(
-                    'results__event__meet'
+                    Prefetch('results', queryset=Result.objects.select_related('event__meet').order_by('event__meet__start_date', 'event__event_number'))
                 ).order_by('last_name', 'first_name'):
-                    for result in swimmer.results.all().order_by('event__meet__start_date', 'event__event_number'):
+                    for result in swimmer.results.all():
                         # Check if swimmer has any valid time - skip if no results
                         has_valid_time = (
                             (result.prelim_time and result.prelim_time > 0) or 
@@ -539,7 +557,7 @@ def export_meet_results_as_zip(meet_id: int) -> str:
             writer.writerow(['Event', 'Swimmer', 'Age', 'Team', 'Prelim Time/Score', 'Prelim Points',
                              'Swimoff Time/Score', 'Swimoff Points', 'Final Time/Score', 'Final Points', 'Best Points'])
             for event in meet.events.select_related('meet').prefetch_related(
-                'results__swimmer__team'
+                Prefetch('results', queryset=Result.objects.select_related('swimmer__team').order_by('final_place', 'prelim_place', 'swim_off_place'))
             ).order_by('event_number'):
                 # Format age group for display
                 age_group = ""
@@ -560,7 +578,7 @@ def export_meet_results_as_zip(meet_id: int) -> str:
                 
                 event_name_with_age = f"{event.name} - {age_group}"
                 
-                for result in event.results.all().order_by('final_place', 'prelim_place', 'swim_off_place'):
+                for result in event.results.all():
                     # Only include results that have points
                     has_points = any([
                         result.prelim_points and result.prelim_points > 0,
@@ -603,11 +621,11 @@ def export_meet_results_as_zip(meet_id: int) -> str:
             writer = csv.writer(f)
             writer.writerow(['Swimmer', 'Age', 'Team', 'Event', 'Prelim Time/Score', 'Prelim Points',
                              'Swimoff Time/Score', 'Swimoff Points', 'Final Time/Score', 'Final Points', 'Best Points'])
-            # Optimize queries with select_related and prefetch_related
+            # Prefetch each list's results already ordered; calling order_by() on a prefetched manager re-queries per row
             for swimmer in meet.swimmers.select_related('team').prefetch_related(
-                'results__event'
+                Prefetch('results', queryset=Result.objects.select_related('event').order_by('event__event_number'))
             ).order_by('last_name', 'first_name'):
-                for result in swimmer.results.all().order_by('event__event_number'):
+                for result in swimmer.results.all():
                     # Only include results that have points
                     has_points = any([
                         result.prelim_points and result.prelim_points > 0,
@@ -1,3 +1,189 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import tempfile
+import zipfile
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError
+from django import forms
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from openpyxl import Workbook
+
+from meets.models import Meet, Team, Event, Swimmer, Result
+from uploads.dryland_parser import DRYLAND_OVERFLOW_EVENT_NUMBER, process_dryland_file
+from uploads.forms import UploadFileForm, _has_zip_central_directory
+from uploads.parser import process_hytek_file
+from hytek_parser.hy3.enums import Course, Stroke, Gender
+
+
+def make_meet(slug='test-meet'):
+    return Meet.objects.create(
+        name='Test Meet',
+        slug=slug,
+        location='Test Pool',
+        start_date=datetime.date(2024, 3, 1),
+        end_date=datetime.date(2024, 3, 3),
+    )
+
+
+def make_parsed_hy3():
+    """Build the parts of a parsed HY3 file that process_hytek_file reads"""
+    def entry(meet_id, first_name, last_name, prelim_time, finals_time):
+        swimmer = SimpleNamespace(
+            first_name=first_name, middle_initial='', last_name=last_name, gender=Gender.MALE,
+            team_code='ABC', age=10, meet_id=meet_id, usa_swimming_id=''
+        )
+        return SimpleNamespace(swimmers=[swimmer], prelim_time=prelim_time, swimoff_time=0, finals_time=finals_time)
+
+    event = SimpleNamespace(
+        number=1, relay=False, gender=Gender.MALE, distance=50, stroke=Stroke.BUTTERFLY, age_min=9, age_max=10,
+        entries=[entry(1, 'Alex', 'Smith', 31.01, 30.29), entry(2, 'Sam', 'Jones', 26.58, 0)]
+    )
+    parsed_meet = SimpleNamespace(
+        events={1: event}, course=Course.SCY, teams={'ABC': SimpleNamespace(name='Alpha Swim Club')}
+    )
+    return SimpleNamespace(meet=parsed_meet)
+
+
+@mock.patch('uploads.parser.hy3_parser.parse_hy3', new=lambda file_path: make_parsed_hy3())
+class ProcessHytekFileTests(TestCase):
+    def setUp(self):
+        self.meet = make_meet()
+
+    def test_results_are_written_and_scored(self):
+        results = process_hytek_file('meet.hy3', meet=self.meet)
+
+        # Sorted by final time; an entry without one sorts last and shows its prelim points
+        event_results = results["Men's 50 Butterfly (SCY)"]
+        self.assertEqual([row['swimmer'] for row in event_results], ['Alex Smith', 'Sam Jones'])
+        self.assertEqual([row['points'] for row in event_results], [900.0, 1000.0])
+
+        event = Event.objects.get(meet=self.meet)
+        self.assertEqual((event.event_number, event.min_age, event.max_age), (1, 9, 10))
+        self.assertEqual(Swimmer.objects.filter(meet=self.meet, team__code='ABC').count(), 2)
+        result = Result.objects.get(event=event, swimmer__swimmer_meet_id='1')
+        self.assertAlmostEqual(result.prelim_points, 850.0)
+        self.assertAlmostEqual(result.final_points, 900.0)
+        self.assertAlmostEqual(result.best_points, 900.0)
+
+    def test_uploading_the_same_file_twice_fails_without_duplicating_results(self):
+        process_hytek_file('meet.hy3', meet=self.meet)
+
+        with self.assertRaises(IntegrityError):
+            process_hytek_file('meet.hy3', meet=self.meet)
+
+        self.assertEqual(Event.objects.filter(meet=self.meet).count(), 1)
+        self.assertEqual(Result.objects.filter(event__meet=self.meet).count(), 2)
+
+
+class ProcessDrylandFileTests(TestCase):
+    def setUp(self):
+        self.meet = make_meet()
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.append(['Name', 'Age', 'Gender', 'Team', 'Chin-Ups', 'Rope Climb'])
+        worksheet.append(['Alex Smith', 10, 'M', 'ABC', 7, 3])
+        worksheet.append(['Sam Jones', 10, 'M', 'ABC', 20, None])
+        worksheet.append([None, None, None, None, None, None])
+        handle, self.file_path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, self.file_path)
+        workbook.save(self.file_path)
+
+    def test_rows_are_written_and_scored(self):
+        results = process_dryland_file(self.file_path, meet=self.meet)
+
+        # Men's 10 Chin-Ups score 50 points a rep; Rope Climb has no table, so the raw score is kept
+        self.assertEqual(
+            [(row['swimmer'], row['points']) for row in results["Men's Chin-Ups - 10"]],
+            [('Sam Jones', 1000.0), ('Alex Smith', 350.0)]
+        )
+        self.assertEqual([row['points'] for row in results["Men's Rope Climb - 10"]], [3.0])
+
+        events = Event.objects.filter(meet=self.meet)
+        self.assertEqual(
+            sorted(events.values_list('name', 'min_age', 'max_age')),
+            [("Men's Chin-Ups - 10", 10, 10), ("Men's Rope Climb - 10", 10, 10)]
+        )
+        self.assertEqual(Team.objects.filter(meet=self.meet).count(), 1)
+        self.assertEqual(
+            sorted(Swimmer.objects.filter(meet=self.meet).values_list('first_name', 'last_name', 'age')),
+            [('Alex', 'Smith', 10), ('Sam', 'Jones', 10)]
+        )
+        result = Result.objects.get(event__name="Men's Chin-Ups - 10", swimmer__first_name='Alex')
+        self.assertEqual((result.final_time, result.final_points, result.best_points), (7.0, 350.0, 350.0))
+
+    def test_reupload_reuses_events_and_swimmers(self):
+        process_dryland_file(self.file_path, meet=self.meet)
+        events = sorted(Event.objects.filter(meet=self.meet).values_list('pk', 'name', 'event_number'))
+        swimmers = sorted(Swimmer.objects.filter(meet=self.meet).values_list('pk', flat=True))
+
+        process_dryland_file(self.file_path, meet=self.meet)
+
+        # Events keep their numbers and swimmers are matched on their generated meet id;
+        # results are added again, as Result.objects.create did
+        self.assertEqual(sorted(Event.objects.filter(meet=self.meet).values_list('pk', 'name', 'event_number')), events)
+        self.assertEqual(sorted(Swimmer.objects.filter(meet=self.meet).values_list('pk', flat=True)), swimmers)
+        self.assertEqual(Result.objects.filter(event__meet=self.meet).count(), 6)
+
+    def test_event_number_clash_takes_an_overflow_number(self):
+        # Men's 10 Chin-Ups in column 4 would be 9000 + 10 * 100 + 4
+        Event.objects.create(
+            meet=self.meet, event_number=10004, name="Men's 50 Freestyle (SCY)", distance=50, stroke='FR', gender='M'
+        )
+
+        process_dryland_file(self.file_path, meet=self.meet)
+
+        event_numbers = dict(Event.objects.filter(meet=self.meet).values_list('name', 'event_number'))
+        self.assertEqual(event_numbers, {
+            "Men's 50 Freestyle (SCY)": 10004,
+            "Men's Chin-Ups - 10": DRYLAND_OVERFLOW_EVENT_NUMBER,
+            "Men's Rope Climb - 10": 10005,
+        })
+
+
+class HasZipCentralDirectoryTests(SimpleTestCase):
+    def make_zip(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zipf:
+            zipf.writestr('meet.hy3', 'A1' * 500)
+        return buffer.getvalue()
+
+    def test_valid_zip(self):
+        self.assertTrue(_has_zip_central_directory(io.BytesIO(self.make_zip())))
+
+    def test_empty_zip(self):
+        buffer = io.BytesIO()
+        zipfile.ZipFile(buffer, 'w').close()
+        self.assertTrue(_has_zip_central_directory(buffer))
+
+    def test_truncated_zip(self):
+        data = self.make_zip()
+        # Cut inside the end of central directory record, then before the central directory
+        self.assertFalse(_has_zip_central_directory(io.BytesIO(data[:-10])))
+        self.assertFalse(_has_zip_central_directory(io.BytesIO(data[:len(data) // 2])))
+
+    def test_central_directory_offset_past_the_data(self):
+        data = self.make_zip()
+        # Dropping bytes before the central directory leaves the record pointing past the end of the file
+        self.assertFalse(_has_zip_central_directory(io.BytesIO(data[:100] + data[200:])))
+
+
+class CleanHy3FileTests(SimpleTestCase):
+    def clean_file(self, content):
+        form = UploadFileForm()
+        form.cleaned_data = {'file': SimpleUploadedFile('meet.hy3', content), 'file_type': 'HY3'}
+        return form.clean_file()
+
+    def test_cp1252_text_is_accepted(self):
+        # Curly quotes and dashes are 0x80-0x9F bytes in cp1252
+        content = 'D1MSmith               O\u2019Brien \u2013 \u201cTeam\u201d\r\n'.encode('cp1252')
+        uploaded = self.clean_file(content)
+        self.assertEqual(uploaded.read(), content)
+
+    def test_binary_file_is_rejected(self):
+        with self.assertRaises(forms.ValidationError):
+            self.clean_file(b'\x00\x01\x02\xff\xfe' * 20)
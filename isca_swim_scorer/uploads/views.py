@@ -17,6 +17,7 @@ import zipfile
 import os
 import tempfile
 import logging
+from operator import itemgetter
 from django.conf import settings
 
 from .models import UploadedFile
@@ -29,6 +30,9 @@ from core.models import Gender, Stroke, Course
 
 logger = logging.getLogger(__name__)
 
+# Sort key for swim results: final, then swim-off, then prelim time (missing times are inf)
+_swim_time_sort_key = itemgetter('_final_time', '_swimoff_time', '_prelim_time')
+
 # Helper Functions for Export Operations
 def get_export_zip_path(meet_id):
     """Generate export zip file path for a specific meet"""
@@ -85,6 +89,10 @@ class UploadedFileListView(ListView):
     template_name = 'uploads/file_list.html'
     context_object_name = 'files'
 
+    def get_queryset(self):
+        # Rows link to file.meet, so join it instead of querying once per row
+        return UploadedFile.objects.select_related('meet')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['download_url'] = reverse_lazy('uploads:upload-download')
@@ -210,6 +218,9 @@ class UploadedFileDeleteView(DeleteView):
     success_url = reverse_lazy('uploads:upload-list')
     template_name = 'uploads/file_confirm_delete.html'
 
+    def get_queryset(self):
+        return UploadedFile.objects.select_related('meet')
+
     def delete(self, request, *args, **kwargs):
         # Get the meet associated with this file
         uploaded_file = self.get_object()
@@ -322,11 +333,7 @@ def get_file_results(request, pk):
                 results_list.append(result_data)
             
             # Sort the results
-            results_list.sort(key=lambda x: (
-                x['_final_time'],
-                x['_swimoff_time'],
-                x['_prelim_time']
-            ))
+            results_list.sort(key=_swim_time_sort_key)
             
             # Remove the sorting fields and add to final results
             for result in results_list:
@@ -729,7 +736,7 @@ def get_combined_results(request):
                 unique_results.append(result)
         
         # Sort by best time
-        unique_results.sort(key=lambda x: x['_sort_time'])
+        unique_results.sort(key=itemgetter('_sort_time'))
         
         # Clean up temporary keys
         for r in unique_results:
@@ -1217,14 +1224,10 @@ def user_view_results(request, file_id):
             # Sort the results based on event type
             if is_dryland:
                 # For dryland events, sort by points (highest first)
-                results_list.sort(key=lambda x: x['_best_points'], reverse=True)
+                results_list.sort(key=itemgetter('_best_points'), reverse=True)
             else:
                 # For swim events, sort by time (fastest first)
-                results_list.sort(key=lambda x: (
-                    x['_final_time'],
-                    x['_swimoff_time'],
-                    x['_prelim_time']
-                ))
+                results_list.sort(key=_swim_time_sort_key)
             
             # Remove the sorting fields and add to final results
             for result in results_list: